@@ -0,0 +1,253 @@
+# pta_archive.py
+import csv
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from pta_columns import to_epoch_us
+
+# 编译器 -> 源文件扩展名（按前缀匹配，取第一个匹配的，较长的前缀须排在以它开头的较短前缀之前；未列出的为txt）
+EXTENSIONS = (
+    ("CLANGXX", "cpp"), ("GXX", "cpp"), ("CLANG", "c"), ("GCC", "c"), ("JAVASCRIPT", "js"), ("JAVA", "java"),
+    ("PYTHON", "py"), ("PYPY", "py"), ("GO", "go"), ("KOTLIN", "kt"), ("RUST", "rs"), ("CSHARP", "cs"),
+    ("PASCAL", "pas"), ("RUBY", "rb"), ("NODE", "js"), ("BASH", "sh"),
+)
+
+INDEX_FIELDS = ("team_id", "team", "problem", "time", "seconds", "submission_id", "status", "compiler",
+                "sha256", "source", "note")
+
+
+def source_extension(compiler):
+    """编译器对应的源文件扩展名"""
+    compiler = (compiler or "").upper()
+    for prefix, extension in EXTENSIONS:
+        if compiler.startswith(prefix):
+            return extension
+    return "txt"
+
+
+def extract_program(submission):
+    """从提交详情中取出(源代码, 编译器)，没有编程题源代码时返回(None, None)"""
+    for detail in submission.get("submissionDetails") or []:
+        program = detail.get("programmingSubmissionDetail") or detail.get("codeCompletionSubmissionDetail")
+        if program and program.get("program") is not None:
+            return program["program"], program.get("compiler") or submission.get("compiler")
+    return None, None
+
+
+class SourceStore:
+    """源代码下载进度和去重后的源代码（SQLite），中断后再次运行只下载尚未完成的提交"""
+
+    def __init__(self, path="pta_sources.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._create_tables()
+
+    def _create_tables(self):
+        """初始化数据表"""
+        with self._lock, self.conn:
+            # sha256为空表示无法获取源代码，原因记在note中
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS submission_sources ("
+                " problem_set_id TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " sha256 TEXT,"
+                " compiler TEXT,"
+                " note TEXT,"
+                " PRIMARY KEY (problem_set_id, id)"
+                ") WITHOUT ROWID"
+            )
+            # 相同内容的源代码只保存一份（zlib压缩）
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS source_blobs ("
+                " sha256 TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " data BLOB NOT NULL"
+                ") WITHOUT ROWID"
+            )
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def done_ids(self, problem_set_id):
+        """已处理（下载成功或确认无法获取）的提交ID"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id FROM submission_sources WHERE problem_set_id = ?", (str(problem_set_id),)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def save_source(self, problem_set_id, submission_id, program, compiler):
+        """保存一个提交的源代码，返回内容摘要"""
+        data = program.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        packed = zlib.compress(data)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO source_blobs (sha256, size, data) VALUES (?, ?, ?)",
+                (digest, len(data), packed)
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO submission_sources (problem_set_id, id, sha256, compiler, note)"
+                " VALUES (?, ?, ?, ?, NULL)",
+                (str(problem_set_id), str(submission_id), digest, compiler)
+            )
+        return digest
+
+    def mark_unavailable(self, problem_set_id, submission_id, note):
+        """记录无法获取源代码的提交，之后不再重试"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO submission_sources (problem_set_id, id, sha256, compiler, note)"
+                " VALUES (?, ?, NULL, NULL, ?)",
+                (str(problem_set_id), str(submission_id), note)
+            )
+
+    def sources(self, problem_set_id):
+        """提交ID -> (sha256, 编译器, 备注)"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, sha256, compiler, note FROM submission_sources WHERE problem_set_id = ?",
+                (str(problem_set_id),)
+            ).fetchall()
+        return {row[0]: row[1:] for row in rows}
+
+    def read_blob(self, digest):
+        """读取一份源代码的原始字节"""
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM source_blobs WHERE sha256 = ?", (digest,)).fetchone()
+        return zlib.decompress(row[0])
+
+
+class SourceArchiver:
+    """下载最近一次导出的比赛中所有提交的源代码，去重后打包为zip
+
+    提交列表取生成器的提交表（generate_contest_xml或render_snapshot之后），
+    最多workers个详情请求同时进行，请求仍经过生成器的限速调度器（和多账号会话池）。
+    每个提交下载后立即写入SourceStore，中断后重新运行会跳过已完成的提交。
+    压缩包中每份不同的源代码只保存一次（sources/<sha256>.<扩展名>），
+    index.csv按队伍、题号、提交时间排序，列出每个提交对应的源文件。
+    """
+
+    def __init__(self, generator, store_path="pta_sources.db", workers=8):
+        self.generator = generator
+        self.store = SourceStore(store_path)
+        self.workers = workers
+
+    def close(self):
+        self.store.close()
+
+    def _problem_set_id(self):
+        if self.generator.submission_table is None:
+            raise ValueError("请先生成一次比赛XML")
+        return str(self.generator.selected_problem_set_id)
+
+    def download(self, on_progress=None):
+        """下载尚未完成的提交详情，返回本次处理的提交数
+
+        on_progress(已完成, 总数)在每个提交处理完后被调用。
+        任一请求失败时取消剩余任务并抛出异常，已下载的部分保留。
+        """
+        problem_set_id = self._problem_set_id()
+        ids = self.generator.submission_table.ids
+        done = self.store.done_ids(problem_set_id)
+        pending = [sub_id for sub_id in ids if sub_id not in done]
+        total, finished = len(ids), len(ids) - len(pending)
+        if on_progress:
+            on_progress(finished, total)
+
+        executor = ThreadPoolExecutor(max_workers=max(1, self.workers), thread_name_prefix="pta-source")
+        futures = [executor.submit(self._download_one, problem_set_id, sub_id) for sub_id in pending]
+        try:
+            for future in as_completed(futures):
+                future.result()
+                finished += 1
+                if on_progress:
+                    on_progress(finished, total)
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        return len(pending)
+
+    def _download_one(self, problem_set_id, submission_id):
+        submission = self.generator.fetch_submission_detail(submission_id)
+        if submission is None:
+            self.store.mark_unavailable(problem_set_id, submission_id, "无权查看")
+            return
+        program, compiler = extract_program(submission)
+        if program is None:
+            self.store.mark_unavailable(problem_set_id, submission_id, "没有源代码")
+        else:
+            self.store.save_source(problem_set_id, submission_id, program, compiler)
+
+    def _index_rows(self, sources):
+        """按队伍、题号、提交时间排序的索引行"""
+        generator = self.generator
+        table = generator.submission_table
+        start_us = to_epoch_us(generator.exam_info["problemSet"]["startAt"])
+        letters = {int(info["xml_id"]): info["letter"] for info in generator.label_map.values()}
+        names = {team["id"]: team["name"] for team in generator.teams}
+        rows = []
+        for row, (sub_id, seconds) in enumerate(zip(table.ids, table.time_offsets(start_us))):
+            team = table.teams[table.team[row]]
+            digest, compiler, note = sources.get(sub_id, (None, None, "未下载"))
+            rows.append({
+                "team_id": team,
+                "team": names.get(team, team),
+                "problem": letters.get(table.problem[row], ""),
+                "time": generator.format_duration(seconds) if seconds >= 0 else "",
+                "seconds": seconds,
+                "submission_id": sub_id,
+                "status": table.statuses[table.status[row]],
+                "compiler": compiler or "",
+                "sha256": digest or "",
+                "source": f"sources/{digest}.{source_extension(compiler)}" if digest else "",
+                "note": note or "",
+            })
+        rows.sort(key=lambda r: (r["team"], len(r["problem"]), r["problem"], r["seconds"]))  # 题号A..Z、AA..
+        return rows
+
+    def write_archive(self, path):
+        """把已下载的源代码写入zip，逐份从存储中读取，不把全部源代码放入内存；返回(提交数, 源文件数)"""
+        problem_set_id = self._problem_set_id()
+        rows = self._index_rows(self.store.sources(problem_set_id))
+        written = set()
+        temp_path = path + ".tmp"
+        try:
+            with zipfile.ZipFile(temp_path, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as archive:
+                for row in rows:
+                    name = row["source"]
+                    if name and name not in written:
+                        written.add(name)
+                        archive.writestr(name, self.store.read_blob(row["sha256"]))
+                with archive.open("index.csv", "w") as f:
+                    # 带BOM，便于Excel直接打开中文队名
+                    text = io.TextIOWrapper(f, encoding="utf-8-sig", newline="")
+                    writer = csv.DictWriter(text, INDEX_FIELDS)
+                    writer.writeheader()
+                    writer.writerows(rows)
+                    text.flush()
+                    text.detach()
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return len(rows), len(written)
+
+    def run(self, path, on_progress=None):
+        """下载并打包，返回(提交数, 源文件数)"""
+        metrics = self.generator.metrics
+        with metrics.phase("sources"):
+            self.download(on_progress)
+            return self.write_archive(path)
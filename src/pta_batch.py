@@ -0,0 +1,168 @@
+# pta_batch.py
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from pta_tool_class import API_BASE_URL, PTAContestGenerator
+
+
+class SharedTokenBucket:
+    """跨进程共享的令牌桶，所有工作进程合计不超过同一个速率"""
+
+    def __init__(self, rate=4.0, burst=4, ctx=None):
+        ctx = ctx or multiprocessing.get_context()
+        # [速率, 桶容量, 当前令牌数, 上次更新时间]
+        self._state = ctx.Array("d", [rate, burst, burst, time.monotonic()])
+
+    def _refill(self, state):
+        now = time.monotonic()
+        state[2] = min(state[1], state[2] + (now - state[3]) * state[0])
+        state[3] = now
+
+    def acquire(self):
+        """取得一个令牌，令牌不足时阻塞等待"""
+        while True:
+            with self._state.get_lock():
+                state = self._state.get_obj()
+                self._refill(state)
+                if state[2] >= 1:
+                    state[2] -= 1
+                    return
+                wait = (1 - state[2]) / state[0]
+            time.sleep(wait)
+
+    def get_rate(self):
+        """当前速率（请求/秒）"""
+        return self._state[0]
+
+    def set_rate(self, rate):
+        """调整速率（对所有进程生效）"""
+        with self._state.get_lock():
+            state = self._state.get_obj()
+            self._refill(state)
+            state[0] = rate
+
+
+def filter_problem_sets(problem_sets, ids=None, pattern=None, since=None):
+    """按ID列表、名称正则和开始时间（ISO字符串，不早于since）筛选get_problem_sets()的结果"""
+    ids = {str(i) for i in ids} if ids else None
+    regex = re.compile(pattern) if pattern else None
+    selected = []
+    for ps in problem_sets:
+        if ids is not None and str(ps["id"]) not in ids:
+            continue
+        if regex is not None and not regex.search(ps["name"] or ""):
+            continue
+        if since and (not ps["start_time"] or ps["start_time"] < since):
+            continue
+        selected.append(ps)
+    return selected
+
+
+_worker_generator = None
+
+
+def _init_worker(cookies, limiter, base_url, store_path, cache_path):
+    """工作进程初始化：每个进程一个生成器，共用全局限速器"""
+    global _worker_generator
+    _worker_generator = PTAContestGenerator(max_workers=2, base_url=base_url)
+    if isinstance(cookies, list):
+        _worker_generator.set_accounts(cookies, rate=None)  # 账号轮换，速率仍由全局限速器控制
+    else:
+        _worker_generator.set_cookies(cookies)
+    _worker_generator.scheduler.limiter = limiter
+    _worker_generator.scheduler.max_rate = limiter.get_rate()  # 自适应调速不超过全局上限
+    if store_path:
+        _worker_generator.set_submission_store(store_path)
+    if cache_path:
+        _worker_generator.set_response_cache(cache_path)
+
+
+def _export_one(problem_set_id, output_path, streaming):
+    """导出单个题目集，异常作为结果返回，不影响其它题目集"""
+    started = time.perf_counter()
+    try:
+        _worker_generator.select_problem_set(problem_set_id)
+        _worker_generator.generate_contest_xml(output_path, streaming=streaming)
+        error = None
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return {
+        "id": str(problem_set_id),
+        "path": output_path if error is None else None,
+        "seconds": time.perf_counter() - started,
+        "error": error,
+    }
+
+
+def batch_export(cookies, problem_set_ids, output_dir=".", processes=4, rate=4.0, streaming=True,
+                 base_url=API_BASE_URL, store_path=None, cache_path=None, on_result=None):
+    """多进程批量导出题目集XML
+
+    所有进程共享一个令牌桶，总请求速率不超过rate。每个题目集的耗时和错误单独记录，
+    单个题目集失败不会中断其它导出。返回按输入顺序排列的结果列表。
+    cookies为多个账号的Cookie列表时，各进程轮流使用这些账号，rate为每个账号的速率。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    if isinstance(cookies, list):
+        rate *= len(cookies)
+    ctx = multiprocessing.get_context()
+    limiter = SharedTokenBucket(rate, max(1, int(rate)), ctx)
+    ids = [str(i) for i in problem_set_ids]
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=max(1, min(processes, len(ids) or 1)), mp_context=ctx,
+                             initializer=_init_worker,
+                             initargs=(cookies, limiter, base_url, store_path, cache_path)) as pool:
+        futures = {
+            pool.submit(_export_one, ps_id, os.path.join(output_dir, f"contest_{ps_id}.xml"), streaming): ps_id
+            for ps_id in ids
+        }
+        for future in as_completed(futures):
+            ps_id = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:  # 工作进程崩溃等
+                result = {"id": ps_id, "path": None, "seconds": 0.0, "error": f"{type(e).__name__}: {e}"}
+            results[ps_id] = result
+            if on_result is not None:
+                on_result(result)
+
+    return [results[ps_id] for ps_id in ids]
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="批量导出多个题目集的比赛XML")
+    parser.add_argument("ids", nargs="*", help="题目集ID，不填时按--match/--since从题目集列表中筛选")
+    parser.add_argument("--config", default="pta_config.json", help="Cookie配置文件")
+    parser.add_argument("--match", help="按名称筛选（正则）")
+    parser.add_argument("--since", help="只导出开始时间不早于该时间的题目集，如2025-01-01")
+    parser.add_argument("-o", "--output-dir", default="contests", help="输出目录")
+    parser.add_argument("-j", "--processes", type=int, default=4, help="并行进程数")
+    parser.add_argument("--rate", type=float, default=4.0, help="所有进程合计的请求速率上限（次/秒）")
+    args = parser.parse_args()
+
+    with open(args.config, "r") as f:
+        config = json.load(f)
+
+    ids = args.ids
+    if not ids or args.match or args.since:
+        lister = PTAContestGenerator()
+        lister.set_cookies(config)
+        ids = [ps["id"] for ps in filter_problem_sets(lister.get_problem_sets(), args.ids, args.match, args.since)]
+    print(f"共{len(ids)}个题目集待导出")
+
+    def _report(result):
+        if result["error"]:
+            print(f"[失败] {result['id']}  {result['seconds']:.1f}s  {result['error']}")
+        else:
+            print(f"[完成] {result['id']}  {result['seconds']:.1f}s  {result['path']}")
+
+    all_results = batch_export(config, ids, args.output_dir, args.processes, args.rate, on_result=_report)
+    failed = [r for r in all_results if r["error"]]
+    print(f"导出完成：成功{len(all_results) - len(failed)}个，失败{len(failed)}个")
@@ -0,0 +1,138 @@
+# pta_benchmark.py
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from pta_mock_server import MockPTAServer, SyntheticContest
+
+# 预设规模：(队伍数, 题目数, 提交数)
+PRESETS = {
+    "tiny": (10, 5, 500),
+    "small": (100, 10, 5000),
+    "medium": (300, 12, 30000),
+    "large": (1000, 13, 100000),
+    "huge": (5000, 15, 500000),
+}
+
+
+def _peak_rss_kb():
+    """当前进程的峰值常驻内存（KB），平台不支持时返回None"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS以字节为单位，Linux以KB为单位
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _run_export(base_url, options, output_path, result_queue):
+    """在独立子进程中执行一次导出，保证峰值内存只统计导出本身"""
+    try:
+        from pta_tool_class import PTAContestGenerator
+
+        generator = PTAContestGenerator(base_url=base_url)
+        if not options.get("rate"):
+            generator.scheduler.limiter = None  # 模拟服务不限流，默认不限速
+        else:
+            generator.scheduler.limiter.set_rate(options["rate"])
+        if options.get("accounts"):
+            # 多账号会话池，每个账号按模拟服务的单账号限速发送请求
+            generator.set_accounts([{"PTASession": f"mock{i}"} for i in range(options["accounts"])],
+                                   rate=options.get("account_rate"))
+        if options.get("store"):
+            generator.set_submission_store(options["store"])
+        if options.get("prefetch") is not None:
+            generator.prefetch_pages = options["prefetch"]
+        if options.get("shards") is not None:
+            generator.shard_workers = options["shards"]
+
+        started = time.perf_counter()
+        generator.select_problem_set("1")
+        generator.generate_contest_xml(output_path, streaming=options.get("streaming", False))
+        result_queue.put({
+            "wall_time": time.perf_counter() - started,
+            "peak_rss_kb": _peak_rss_kb(),
+            "output_bytes": os.path.getsize(output_path),
+        })
+    except Exception as e:
+        result_queue.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def run_case(name, teams, problems, submissions, latency=0.0, repeat=1, practice=0, **options):
+    """针对一个规模启动模拟服务并导出repeat次，返回每次的统计结果"""
+    contest = SyntheticContest(teams, problems, submissions, practice=practice)
+    server = MockPTAServer(contest, latency=latency, account_rate=options.get("account_rate")).start()
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            if options.get("store") is True:
+                options["store"] = os.path.join(tmp_dir, "submissions.db")
+            for run in range(repeat):
+                server.reset_stats()
+                queue = ctx.Queue()
+                output_path = os.path.join(tmp_dir, f"{name}.xml")
+                process = ctx.Process(target=_run_export, args=(server.base_url, options, output_path, queue))
+                process.start()
+                process.join()
+                result = queue.get() if not queue.empty() else {"error": f"子进程异常退出（{process.exitcode}）"}
+                result.update({
+                    "case": name, "run": run + 1, "teams": teams, "problems": problems,
+                    "submissions": submissions, "practice": practice, "latency": latency,
+                    "requests": server.request_count, "bytes_received": server.bytes_sent,
+                })
+                results.append(result)
+    finally:
+        server.stop()
+    return results
+
+
+def format_result(result):
+    if "error" in result:
+        return f"{result['case']:<8} #{result['run']}  失败：{result['error']}"
+    rss = f"{result['peak_rss_kb'] / 1024:.1f}MB" if result["peak_rss_kb"] else "-"
+    return (f"{result['case']:<8} #{result['run']}  队伍{result['teams']:>5}  提交{result['submissions']:>7}  "
+            f"耗时{result['wall_time']:>8.2f}s  请求{result['requests']:>6}  "
+            f"下载{result['bytes_received'] / 1048576:>7.1f}MB  峰值内存{rss:>8}  "
+            f"输出{result['output_bytes'] / 1048576:>7.1f}MB")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="基于本地模拟PTA服务的端到端性能测试")
+    parser.add_argument("cases", nargs="*", default=["tiny", "small", "medium"],
+                        help=f"预设规模：{', '.join(PRESETS)}，或 队伍数x题目数x提交数")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟每个请求的网络延迟（秒）")
+    parser.add_argument("--rate", type=float, default=0, help="请求速率上限（次/秒），0表示不限速")
+    parser.add_argument("--streaming", action="store_true", help="使用流式XML写入")
+    parser.add_argument("--store", action="store_true", help="启用本地提交存储（第二次起为增量导出）")
+    parser.add_argument("--shards", type=int, help="按题目分片并发获取提交记录的请求数，1表示不分片")
+    parser.add_argument("--practice", type=int, default=0, help="额外的比赛时间外练习提交数")
+    parser.add_argument("--prefetch", type=int, help="后台预取的提交记录页数，0表示不预取（默认使用生成器的设置）")
+    parser.add_argument("--accounts", type=int, help="使用多账号会话池的账号数")
+    parser.add_argument("--account-rate", type=float, help="模拟服务对每个账号的速率上限（次/秒），超过时返回429")
+    parser.add_argument("--repeat", type=int, default=1, help="每个规模重复次数")
+    parser.add_argument("--json", help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    all_results = []
+    for case in args.cases:
+        if case in PRESETS:
+            size = PRESETS[case]
+        else:
+            size = tuple(int(x) for x in case.split("x"))
+        for res in run_case(case, *size, latency=args.latency, repeat=args.repeat, practice=args.practice,
+                            rate=args.rate, streaming=args.streaming, store=args.store,
+                            prefetch=args.prefetch, shards=args.shards, accounts=args.accounts,
+                            account_rate=args.account_rate):
+            print(format_result(res))
+            all_results.append(res)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(all_results, f, ensure_ascii=False, indent=2)
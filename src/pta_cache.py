@@ -0,0 +1,155 @@
+# pta_cache.py
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# 各接口的缓存有效期（秒），未匹配的接口（如提交记录）不缓存
+DEFAULT_TTLS = (
+    (re.compile(r"/problem-sets/admin\?"), 120),
+    (re.compile(r"/problem-sets/\w+/preview/problems\?"), 3600),
+    (re.compile(r"/problem-sets/\w+/members\?"), 600),
+    (re.compile(r"/problem-sets/\w+(/exams)?$"), 300),
+)
+
+# 图形界面使用：成员和题目集信息每次都重新验证（未变化时304），
+# 避免比赛中途加入的成员的提交被当作非成员丢弃
+INTERACTIVE_TTLS = (
+    (re.compile(r"/problem-sets/admin\?"), 120),
+    (re.compile(r"/problem-sets/\w+/preview/problems\?"), 3600),
+    (re.compile(r"/problem-sets/\w+/members\?"), 0),
+    (re.compile(r"/problem-sets/\w+(/exams)?$"), 0),
+)
+
+
+class CachedResponse:
+    """从本地缓存返回的响应，提供与requests.Response相同的常用属性"""
+
+    from_cache = True
+
+    def __init__(self, url, content, headers=None, status_code=200):
+        self.url = url
+        self.content = content
+        self.headers = headers or {}
+        self.status_code = status_code
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class ResponseCache:
+    """接口响应的本地磁盘缓存（SQLite）
+
+    按接口设置有效期，总大小超过max_bytes时按最近访问时间淘汰（LRU）。
+    过期的条目如果带有ETag/Last-Modified，会用条件请求重新验证，304时直接续期。
+    """
+
+    def __init__(self, path="pta_http_cache.db", max_bytes=64 * 1024 * 1024, ttls=DEFAULT_TTLS):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttls = ttls
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " url TEXT NOT NULL,"
+                " body BLOB NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " stored_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " size INTEGER NOT NULL"
+                ")"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def ttl_for(self, url):
+        """接口的缓存有效期，不缓存时返回None"""
+        for pattern, ttl in self.ttls:
+            if pattern.search(url):
+                return ttl
+        return None
+
+    @staticmethod
+    def _key(url, scope):
+        # scope区分不同账号，避免不同Cookie看到彼此的缓存
+        return hashlib.sha1(f"{scope}\n{url}".encode("utf-8")).hexdigest()
+
+    def lookup(self, url, scope=""):
+        """查询缓存，返回(响应, 是否仍在有效期内, 重新验证用的请求头)，未命中时返回(None, False, {})"""
+        ttl = self.ttl_for(url)
+        key = self._key(url, scope)
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+        if not row:
+            self.misses += 1
+            return None, False, {}
+
+        body, etag, last_modified, stored_at = row
+        fresh = ttl is not None and now - stored_at < ttl
+        if fresh:
+            self.hits += 1
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return CachedResponse(url, body), fresh, headers
+
+    def store(self, url, resp, scope=""):
+        """保存一个200响应，并在超出容量时淘汰最久未访问的条目"""
+        body = resp.content
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses"
+                " (key, url, body, etag, last_modified, stored_at, accessed_at, size)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (self._key(url, scope), url, body, resp.headers.get("ETag"),
+                 resp.headers.get("Last-Modified"), now, now, len(body))
+            )
+            self._evict()
+
+    def renew(self, url, scope=""):
+        """重新验证通过（304），刷新保存时间"""
+        self.hits += 1
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE responses SET stored_at = ? WHERE key = ?",
+                              (time.time(), self._key(url, scope)))
+
+    def _evict(self):
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = self.conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall()
+        expired = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            expired.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", expired)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM responses")
@@ -0,0 +1,304 @@
+# pta_cli.py
+"""PTA比赛XML生成器命令行入口（无界面，可用于服务器和定时任务）
+
+    python pta_cli.py list
+    python pta_cli.py export 1234567890 -o contest.xml
+    python pta_cli.py export 123 456 789 -o contests/ -j 4
+    python pta_cli.py export 1234567890 --progress --metrics metrics.json --profile cprofile
+    python pta_cli.py sync 1234567890
+    python pta_cli.py export 1234567890 --snapshot contest.ptas
+    python pta_cli.py export 1234567890 --sources sources.zip
+    python pta_cli.py render contest.ptas -o contest.xml.gz --region 湖北 --university 某大学
+    python pta_cli.py serve --port 8900 --max-age 30
+    python pta_cli.py --config a.json --config b.json export 1234567890
+"""
+import argparse
+import json
+import sys
+
+CONFIG_FILE = "pta_config.json"
+CACHE_FILE = "pta_cache.db"
+STORE_FILE = "pta_submissions.db"
+SOURCES_FILE = "pta_sources.db"
+
+
+def _load_config(path):
+    """读取Cookie配置文件"""
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise SystemExit(f"找不到Cookie配置文件：{path}（可先在界面中保存配置）")
+
+
+def _load_configs(args):
+    """读取--config指定的所有Cookie配置（可指定多个账号）"""
+    return [_load_config(path) for path in args.config or [CONFIG_FILE]]
+
+
+def _make_generator(args):
+    """按命令行参数创建生成器（此时才导入业务模块）"""
+    from pta_tool_class import PTAContestGenerator
+
+    generator = PTAContestGenerator()
+    configs = _load_configs(args)
+    if len(configs) > 1:
+        generator.set_accounts(configs, rate=args.rate or 4.0)  # 多账号时--rate为每个账号的速率
+    else:
+        generator.set_cookies(configs[0])
+    if args.rate and generator.scheduler.limiter is not None:
+        generator.scheduler.limiter.set_rate(args.rate)
+        generator.scheduler.max_rate = args.rate
+    if args.cache:
+        generator.set_response_cache(args.cache)
+    return generator
+
+
+def cmd_list(args):
+    """列出题目集"""
+    generator = _make_generator(args)
+    problem_sets = generator.get_problem_sets(refresh=args.refresh)
+    if args.match:
+        from pta_batch import filter_problem_sets
+        problem_sets = filter_problem_sets(problem_sets, pattern=args.match)
+
+    if args.json:
+        json.dump(problem_sets, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+    for ps in problem_sets:
+        print(f"{ps['id']}\t{ps['start_time'] or '未设置'}\t{ps['name']}")
+
+
+def _print_progress(event):
+    """在标准错误输出的同一行刷新进度"""
+    print(f"\r{event['phase_name']}  {event['elapsed']:.1f}s  请求{event['requests']}次  "
+          f"{event['pages']}页/{event['runs']}条提交  {event['runs_per_second']:.0f}条/秒",
+          end="", file=sys.stderr, flush=True)
+
+
+def _report_accounts(generator):
+    """多账号时提示已失效或被限流过的账号"""
+    status = getattr(generator.session, "status", None)
+    for account in status() if status else []:
+        if account["disabled"]:
+            print(f"警告：{account['name']}{account['disabled']}，已停用", file=sys.stderr)
+        elif account["throttled"]:
+            print(f"提示：{account['name']}被限流{account['throttled']}次", file=sys.stderr)
+
+
+def cmd_export(args):
+    """导出一个或多个题目集的XML"""
+    if len(args.ids) > 1:
+        from pta_batch import batch_export
+
+        def _report(result):
+            status = "失败" if result["error"] else "完成"
+            print(f"[{status}] {result['id']}  {result['seconds']:.1f}s  {result['error'] or result['path']}")
+
+        configs = _load_configs(args)
+        results = batch_export(configs if len(configs) > 1 else configs[0], args.ids, args.output or ".", args.processes,
+                               args.rate or 4.0, streaming=not args.tree, store_path=args.store,
+                               cache_path=args.cache, on_result=_report)
+        return 1 if any(r["error"] for r in results) else 0
+
+    generator = _make_generator(args)
+    if args.store:
+        generator.set_submission_store(args.store)
+    if args.progress:
+        generator.progress_callback = _print_progress
+    if args.shards:
+        generator.shard_workers = args.shards
+    generator.select_problem_set(args.ids[0])
+    output = generator.generate_contest_xml(args.output or f"contest_{args.ids[0]}.xml",
+                                            streaming=not args.tree, refresh=args.refresh, profile=args.profile)
+    if args.progress:
+        print(file=sys.stderr)
+    if args.snapshot:
+        generator.save_snapshot(args.snapshot)
+    if args.standings:
+        with open(args.standings, "w", encoding="utf-8") as f:
+            json.dump(generator.scoreboard.to_dict(generator.medals), f, ensure_ascii=False, indent=2)
+    print(f"生成完成：{output}")
+    if args.sources:
+        _archive_sources(generator, args)
+    _report_accounts(generator)
+    if args.metrics:
+        generator.metrics.dump(args.metrics)
+
+
+def _archive_sources(generator, args):
+    """下载全部提交的源代码并打包"""
+    from pta_archive import SourceArchiver
+
+    def _progress(done, total):
+        print(f"\r下载源代码  {done}/{total}", end="", file=sys.stderr, flush=True)
+
+    generator.metrics.progress_callback = None  # 改为按提交数显示下载进度
+    archiver = SourceArchiver(generator, args.sources_db, args.source_workers)
+    try:
+        runs, files = archiver.run(args.sources, _progress if args.progress else None)
+    finally:
+        archiver.close()
+    if args.progress:
+        print(file=sys.stderr)
+    print(f"源代码打包完成：{args.sources}（{runs}条提交，去重后{files}份源代码）")
+
+
+def _load_judgements(path):
+    """读取判罚类型列表，solved/penalty统一为"true"/"false"字符串（允许写成JSON布尔值）"""
+    with open(path, "r", encoding="utf-8") as f:
+        judgements = json.load(f)
+    for judgement in judgements:
+        for key in ("solved", "penalty"):
+            value = str(judgement.get(key)).lower()
+            if value not in ("true", "false"):
+                raise ValueError(f"判罚类型{judgement.get('acronym')}的{key}必须是true或false，而不是{judgement.get(key)!r}")
+            judgement[key] = value
+    return judgements
+
+
+def cmd_render(args):
+    """根据快照离线重新生成XML（不需要Cookie和网络）"""
+    from pta_tool_class import PTAContestGenerator
+
+    generator = PTAContestGenerator()
+    if args.region:
+        generator.region = args.region
+    if args.university:
+        generator.university = args.university
+    if args.judgements:
+        generator.JUDGEMENTS = _load_judgements(args.judgements)
+    output = args.output or args.snapshot.rsplit(".", 1)[0] + ".xml"
+    generator.render_snapshot(args.snapshot, output, streaming=not args.tree)
+    print(f"生成完成：{output}（{generator.metrics.runs}条提交，用时{sum(generator.metrics.phases.values()):.2f}秒）")
+
+
+def cmd_sync(args):
+    """把提交记录增量同步到本地存储"""
+    generator = _make_generator(args)
+    generator.set_submission_store(args.store)
+    for problem_set_id in args.ids:
+        generator.select_problem_set(problem_set_id)
+        saved = generator.sync_submissions()
+        total = generator.submission_store.count(problem_set_id)
+        print(f"{problem_set_id}: 本次同步{saved}条，本地共{total}条")
+
+
+def cmd_serve(args):
+    """启动局域网导出服务，多台机器共用一次上游导出"""
+    from pta_server import ContestExportServer, ContestExportService
+
+    def _configure(generator):
+        if args.shards:
+            generator.shard_workers = args.shards
+        if args.region:
+            generator.region = args.region
+        if args.university:
+            generator.university = args.university
+
+    configs = _load_configs(args)
+    service = ContestExportService(configs if len(configs) > 1 else configs[0], max_age=args.max_age,
+                                   cache_bytes=int(args.cache_mb * 1024 * 1024), store_path=args.store,
+                                   cache_path=args.cache, max_exports=args.exports, configure=_configure,
+                                   rate=args.rate)
+    server = ContestExportServer(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    print(f"导出服务已启动：http://{host}:{port}/contests/<题目集ID>.xml（数据最多{args.max_age:g}秒前）")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="pta_cli", description="PTA比赛滚榜XML生成器（命令行版）")
+    parser.add_argument("--config", action="append",
+                        help=f"Cookie配置文件（默认{CONFIG_FILE}），重复指定时多个账号轮流发送请求")
+    parser.add_argument("--cache", default=CACHE_FILE, help=f"接口缓存文件（默认{CACHE_FILE}）")
+    parser.add_argument("--no-cache", dest="cache", action="store_const", const=None, help="不使用接口缓存")
+    parser.add_argument("--rate", type=float, help="请求速率上限（次/秒，多账号时为每个账号的速率）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("list", help="列出账号下的题目集")
+    p.add_argument("--refresh", action="store_true", help="忽略缓存重新获取")
+    p.add_argument("--match", help="按名称筛选（正则）")
+    p.add_argument("--json", action="store_true", help="以JSON格式输出")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("export", help="生成题目集的比赛XML")
+    p.add_argument("ids", nargs="+", help="题目集ID，多个时并行批量导出")
+    p.add_argument("-o", "--output", help="输出文件（多个ID时为输出目录）")
+    p.add_argument("--store", help="使用本地提交存储增量导出，如" + STORE_FILE)
+    p.add_argument("--refresh", action="store_true", help="忽略缓存重新获取")
+    p.add_argument("--tree", action="store_true", help="在内存中构建完整XML树后再保存（默认流式写入）")
+    p.add_argument("-j", "--processes", type=int, default=4, help="批量导出的进程数")
+    p.add_argument("--shards", type=int, help="按题目分片并发获取提交记录的请求数（默认4，1表示逐页顺序获取）")
+    p.add_argument("--snapshot", help="同时保存比赛数据快照，之后可用render命令离线重新生成XML")
+    p.add_argument("--standings", help="把封榜前榜单、最终榜单、奖牌线和按分钟的榜单变化写入JSON文件")
+    p.add_argument("--sources", help="同时下载全部提交的源代码，去重后打包为zip（附按队伍、题号、时间排序的index.csv）")
+    p.add_argument("--sources-db", default=SOURCES_FILE,
+                   help=f"源代码下载进度和内容的存储文件，中断后可继续（默认{SOURCES_FILE}）")
+    p.add_argument("--source-workers", type=int, default=8, help="同时下载源代码的请求数（默认8）")
+    p.add_argument("--progress", action="store_true", help="在标准错误输出显示实时进度")
+    p.add_argument("--metrics", help="把各阶段耗时、请求和吞吐统计写入JSON文件")
+    p.add_argument("--profile", choices=("cprofile", "tracemalloc"),
+                   help="性能分析：cprofile保存到<输出文件>.prof，tracemalloc结果写入--metrics")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("render", help="根据比赛数据快照离线生成XML")
+    p.add_argument("snapshot", help="export --snapshot保存的快照文件")
+    p.add_argument("-o", "--output", help="输出文件，以.gz结尾时gzip压缩（默认与快照同名的.xml）")
+    p.add_argument("--region", help="地区名称")
+    p.add_argument("--university", help="学校名称")
+    p.add_argument("--judgements", help="判罚类型列表的JSON文件，格式同pta_tool_class.py中的JUDGEMENTS")
+    p.add_argument("--tree", action="store_true", help="在内存中构建完整XML树后再保存（默认流式写入）")
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("sync", help="增量同步提交记录到本地存储")
+    p.add_argument("ids", nargs="+", help="题目集ID")
+    p.add_argument("--store", default=STORE_FILE, help=f"本地提交存储文件（默认{STORE_FILE}）")
+    p.set_defaults(func=cmd_sync)
+
+    p = sub.add_parser("serve", help="启动局域网导出服务，提供比赛XML和榜单JSON")
+    p.add_argument("--host", default="0.0.0.0", help="监听地址（默认0.0.0.0）")
+    p.add_argument("--port", type=int, default=8900, help="监听端口（默认8900）")
+    p.add_argument("--max-age", type=float, default=30, help="缓存结果的最长有效时间（秒，默认30）")
+    p.add_argument("--cache-mb", type=float, default=256, help="渲染结果缓存的大小上限（MB，默认256）")
+    p.add_argument("--exports", type=int, default=2, help="同时进行的上游导出数上限（默认2）")
+    p.add_argument("--store", default=STORE_FILE, help=f"本地提交存储文件，刷新时增量同步（默认{STORE_FILE}）")
+    p.add_argument("--shards", type=int, help="按题目分片并发获取提交记录的请求数")
+    p.add_argument("--region", help="地区名称")
+    p.add_argument("--university", help="学校名称")
+    p.set_defaults(func=cmd_serve)
+    return parser
+
+
+# 只支持单个题目集导出的选项（批量导出时不支持）
+SINGLE_EXPORT_OPTIONS = ("snapshot", "standings", "sources", "metrics", "profile", "progress", "shards", "refresh")
+
+
+def _check_export_args(parser, args):
+    """批量导出不支持的选项直接报错，而不是静默忽略"""
+    if len(args.ids) > 1:
+        unsupported = [f"--{name}" for name in SINGLE_EXPORT_OPTIONS if getattr(args, name)]
+        if unsupported:
+            parser.error(f"导出多个题目集时不支持{'、'.join(unsupported)}，请逐个导出")
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.func is cmd_export:
+        _check_export_args(parser, args)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print(f"错误：{e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# pta_columns.py
+from array import array
+from datetime import datetime, timedelta, timezone
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+
+def to_epoch_us(iso_time):
+    """ISO时间字符串转为UTC微秒时间戳（整数，避免浮点误差）"""
+    return (datetime.fromisoformat(iso_time.replace("Z", "+00:00")) - EPOCH) // MICROSECOND
+
+
+class SubmissionTable:
+    """列式提交记录表
+
+    每列用array保存定长数值，队伍和判题状态按出现顺序编码为下标，
+    题目在入表时一次性映射为label_map中的xml_id（未知题目为0）。
+    时间偏移、solved/penalty等派生列按批计算，不再逐条解析和比较字符串。
+    入表时按提交ID去重；给出window（开始、结束的微秒时间戳）或teams时，
+    不在比赛时间内或不属于这些队伍的提交直接丢弃。
+    """
+
+    def __init__(self, label_map=None, window=None, teams=None):
+        self.window = window
+        self.team_filter = set(teams) if teams else None
+        self.dropped = 0             # 被丢弃的提交数
+        self.before_window = False   # 最近一批提交是否全部早于比赛开始（由新到旧翻页时可停止）
+        self._seen = set()
+        self.ids = []                # 提交ID
+        self.team = array("I")       # 队伍编码 -> self.teams
+        self.problem = array("H")    # 题目xml_id，0表示不在题目列表中
+        self.submit_us = array("q")  # 提交时间，UTC微秒时间戳
+        self.status = array("H")     # 判题状态编码 -> self.statuses
+        self.teams = []
+        self.statuses = []
+        self._team_codes = {}
+        self._status_codes = {}
+        self._problem_codes = {
+            problem_id: int(info["xml_id"]) for problem_id, info in (label_map or {}).items()
+        }
+
+    # 数值列名（均为array）
+    COLUMNS = ("team", "problem", "submit_us", "status")
+
+    @classmethod
+    def from_columns(cls, label_map, ids, columns, teams, statuses):
+        """由已编码的列直接构建（如从快照加载），不再逐条解析"""
+        table = cls(label_map)
+        table.ids = ids
+        for name in cls.COLUMNS:
+            setattr(table, name, columns[name])
+        table.teams = teams
+        table.statuses = statuses
+        table._team_codes = {team: code for code, team in enumerate(teams)}
+        table._status_codes = {status: code for code, status in enumerate(statuses)}
+        table._seen = set(ids)
+        return table
+
+    def __len__(self):
+        return len(self.ids)
+
+    def extend(self, submissions):
+        """追加一批提交，返回新增行的起始下标"""
+        start = len(self.ids)
+        team_codes, status_codes, problem_codes = self._team_codes, self._status_codes, self._problem_codes
+        window, team_filter, seen = self.window, self.team_filter, self._seen
+        newest_us = None
+        for sub in submissions:
+            submit_us = to_epoch_us(sub["submitAt"])
+            if window is not None:
+                if newest_us is None or submit_us > newest_us:
+                    newest_us = submit_us
+                if not window[0] <= submit_us < window[1]:
+                    self.dropped += 1
+                    continue
+            sub_id = str(sub["id"])
+            team = sub["userId"]
+            if sub_id in seen or (team_filter is not None and team not in team_filter):
+                self.dropped += 1
+                continue
+            seen.add(sub_id)
+
+            team_code = team_codes.get(team)
+            if team_code is None:
+                team_code = team_codes[team] = len(self.teams)
+                self.teams.append(team)
+            status = sub["status"]
+            status_code = status_codes.get(status)
+            if status_code is None:
+                status_code = status_codes[status] = len(self.statuses)
+                self.statuses.append(status)
+
+            self.ids.append(sub_id)
+            self.team.append(team_code)
+            self.problem.append(problem_codes.get(sub["problemSetProblemId"], 0))
+            self.submit_us.append(submit_us)
+            self.status.append(status_code)
+        self.before_window = newest_us is not None and newest_us < window[0]
+        return start
+
+    def time_offsets(self, contest_start_us, start=0, stop=None):
+        """相对比赛开始的秒数（向零取整）"""
+        return [int((us - contest_start_us) / 1000000) for us in self.submit_us[start:stop]]
+
+    def status_lookup(self, func):
+        """按状态编码批量计算派生列：对每种状态只调用一次func"""
+        return [func(status) for status in self.statuses]
+
+    def map_status(self, table, start=0, stop=None):
+        """用status_lookup得到的查找表映射一段状态列"""
+        return [table[code] for code in self.status[start:stop]]
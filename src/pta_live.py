@@ -0,0 +1,161 @@
+# pta_live.py
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from pta_store import PENDING_STATUSES, submission_key
+
+
+class LiveContestFeed:
+    """比赛实时模式：增量轮询新提交，追加到NDJSON事件流，有新事件或每隔snapshot_interval秒刷新XML快照
+
+    每次轮询只向前翻到本地已有的最新提交（或最早仍在判题的提交）为止，
+    请求量与新增提交数成正比，与比赛规模无关。
+    事件格式参考CLICS事件流：每行一个{"type", "op", "data"}对象。
+    """
+
+    def __init__(self, generator, feed_path="events.ndjson", snapshot_path="contest.xml",
+                 store_path="pta_submissions.db", interval=5, snapshot_interval=60):
+        self.generator = generator
+        self.feed_path = feed_path
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self.snapshot_interval = snapshot_interval
+        if generator.submission_store is None:
+            generator.set_submission_store(store_path)
+        # 快照直接使用本地存储中的数据，由轮询负责同步，避免漏发事件
+        generator.sync_on_export = False
+        self.event_count = 0
+        self.emitted = self._load_emitted()
+        self._contest_start = None
+        self._last_snapshot = None
+
+    def _load_emitted(self):
+        """读取已有事件流，恢复每个提交最后一次发出的判题状态"""
+        emitted = {}
+        if not os.path.exists(self.feed_path):
+            return emitted
+        with open(self.feed_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue  # 上次中断时可能留下不完整的行
+                self.event_count += 1
+                data = event.get("data", {})
+                if event.get("type") == "submissions":
+                    emitted.setdefault(data.get("id"), None)
+                elif event.get("type") == "judgements":
+                    emitted[data.get("submission_id")] = data.get("judgement_type_id")
+        return emitted
+
+    def run(self, stop_event=None):
+        """持续轮询，直到stop_event被设置"""
+        stop_event = stop_event or threading.Event()
+        while not stop_event.is_set():
+            # 先同步再生成快照，首个快照（包括换用新存储重启后）就包含已有的提交
+            written = self.poll()
+            if written or self._last_snapshot is None \
+                    or time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+                self.snapshot()
+            stop_event.wait(self.interval)
+
+    def poll(self):
+        """同步一次新提交并追加事件，返回本次写入的事件数"""
+        self._ensure_metadata()
+        submissions = []
+        self.generator.sync_submissions(on_page=submissions.extend)
+        # 续传的（较早的）范围先于新范围同步，统一按提交ID由新到旧排列，事件才按时间先后输出
+        submissions.sort(key=lambda sub: submission_key(sub["id"]), reverse=True)
+        events = self._events_for(submissions)
+        if events:
+            with open(self.feed_path, "a", encoding="utf-8") as f:
+                for event in events:
+                    f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        return len(events)
+
+    def _ensure_metadata(self):
+        """尚未生成过快照时先获取比赛信息和题目，事件需要比赛开始时间和题号"""
+        generator = self.generator
+        problem_set = generator.exam_info.get("problemSet", {})
+        if str(problem_set.get("id")) != str(generator.selected_problem_set_id):
+            generator.exam_info = generator._fetch_exam_info()
+        if not generator.label_map:
+            problems = generator._fetch_problems().get("problemSetProblems", [])
+            generator.label_map = generator._build_label_map(problems)
+
+    def snapshot(self):
+        """刷新XML快照（写入器先写临时文件再替换，读取方不会看到半个文件）"""
+        self.generator.generate_contest_xml(self.snapshot_path, streaming=True)
+        self._last_snapshot = time.monotonic()
+
+    def _events_for(self, submissions):
+        """把提交转换成事件（输入由新到旧，事件按时间先后输出）"""
+        events = []
+        flags = self.generator._judgement_flags()
+        for sub in reversed(submissions):
+            sub_id = str(sub["id"])
+            status = sub.get("status")
+            if sub_id not in self.emitted:
+                events.append(self._event("submissions", "create", self._submission_data(sub)))
+                self.emitted[sub_id] = None
+            if status in PENDING_STATUSES or status == self.emitted[sub_id]:
+                continue
+            op = "create" if self.emitted[sub_id] is None else "update"
+            solved, penalty = flags.get(status, (False, True))
+            events.append(self._event("judgements", op, {
+                "id": sub_id,
+                "submission_id": sub_id,
+                "judgement_type_id": status,
+                "solved": solved,
+                "penalty": penalty,
+            }))
+            self.emitted[sub_id] = status
+        return events
+
+    def _event(self, event_type, op, data):
+        self.event_count += 1
+        return {"id": str(self.event_count), "type": event_type, "op": op, "data": data}
+
+    def _submission_data(self, sub):
+        """提交事件内容"""
+        if self._contest_start is None:
+            start_at = self.generator.exam_info.get("problemSet", {}).get("startAt")
+            self._contest_start = datetime.fromisoformat(start_at.replace("Z", "+00:00")).astimezone(timezone.utc)
+        submit_time = datetime.fromisoformat(sub["submitAt"].replace("Z", "+00:00")).astimezone(timezone.utc)
+        problem_info = self.generator.label_map.get(sub.get("problemSetProblemId"), {})
+        return {
+            "id": str(sub["id"]),
+            "team_id": sub.get("userId"),
+            "problem_id": problem_info.get("letter"),
+            "time": submit_time.isoformat(),
+            "contest_time": int((submit_time - self._contest_start).total_seconds()),
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    from pta_tool_class import PTAContestGenerator
+
+    parser = argparse.ArgumentParser(description="PTA比赛实时事件流")
+    parser.add_argument("problem_set_id", help="题目集ID")
+    parser.add_argument("--config", default="pta_config.json", help="Cookie配置文件")
+    parser.add_argument("--feed", default="events.ndjson", help="事件流输出文件")
+    parser.add_argument("--snapshot", default="contest.xml", help="XML快照文件")
+    parser.add_argument("--interval", type=float, default=5, help="轮询间隔（秒）")
+    parser.add_argument("--snapshot-interval", type=float, default=60, help="没有新事件时的快照刷新间隔（秒）")
+    args = parser.parse_args()
+
+    generator = PTAContestGenerator()
+    with open(args.config, "r") as f:
+        generator.set_cookies(json.load(f))
+    generator.select_problem_set(args.problem_set_id)
+
+    feed = LiveContestFeed(generator, args.feed, args.snapshot,
+                           interval=args.interval, snapshot_interval=args.snapshot_interval)
+    try:
+        feed.run()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,165 @@
+# pta_metrics.py
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+# 请求耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+# 阶段名称（进度显示用）
+PHASE_NAMES = {
+    "metadata": "获取比赛信息",
+    "load": "读取快照",
+    "render_metadata": "写入比赛信息",
+    "submissions": "获取提交记录",
+    "finalize": "写入结束信息",
+    "save": "保存XML",
+    "sources": "下载源代码",
+}
+
+
+class ExportMetrics:
+    """一次导出的统计信息：各阶段耗时、请求数/耗时分布/流量、页数、提交数和XML大小
+
+    progress_callback(event)在阶段切换、每个请求和每页提交处理完后被调用，
+    event为包含phase、pages、runs、runs_per_second等字段的字典。
+    """
+
+    def __init__(self, progress_callback=None):
+        self.progress_callback = progress_callback
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.current_phase = None
+        self.requests = 0
+        self.failed_requests = 0
+        self.cache_hits = 0
+        self.bytes_received = 0
+        self.latency_total = 0.0
+        self.latency_histogram = [0] * len(LATENCY_BUCKETS)
+        self.pages = 0
+        self.runs = 0
+        self.dropped_runs = 0
+        self.xml_bytes = 0
+        self.profile = None
+        self._submissions_started = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """记录一个阶段的耗时"""
+        self.current_phase = name
+        if name == "submissions":
+            self._submissions_started = time.perf_counter()
+        self._notify()
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def record_request(self, url, status_code, seconds, size):
+        """记录一次HTTP请求（包括重试），status_code为None表示网络错误"""
+        with self._lock:
+            self.requests += 1
+            if status_code is None or status_code >= 400:
+                self.failed_requests += 1
+            self.bytes_received += size
+            self.latency_total += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    self.latency_histogram[i] += 1
+                    break
+        self._notify()
+
+    def record_cache_hit(self):
+        with self._lock:
+            self.cache_hits += 1
+
+    def record_page(self, runs, dropped=0):
+        """记录处理完的一页提交，dropped为被过滤掉的提交数"""
+        with self._lock:
+            self.pages += 1
+            self.runs += runs
+            self.dropped_runs += dropped
+        self._notify()
+
+    def runs_per_second(self):
+        if self._submissions_started is None:
+            return 0.0
+        elapsed = time.perf_counter() - self._submissions_started
+        return self.runs / elapsed if elapsed > 0 else 0.0
+
+    def _notify(self):
+        if self.progress_callback is not None:
+            self.progress_callback({
+                "phase": self.current_phase,
+                "phase_name": PHASE_NAMES.get(self.current_phase, self.current_phase),
+                "elapsed": time.perf_counter() - self.started,
+                "requests": self.requests,
+                "pages": self.pages,
+                "runs": self.runs,
+                "runs_per_second": self.runs_per_second(),
+            })
+
+    def to_dict(self):
+        """导出为可JSON序列化的字典"""
+        histogram = {
+            ("+inf" if bound == float("inf") else f"<={bound}s"): count
+            for bound, count in zip(LATENCY_BUCKETS, self.latency_histogram)
+        }
+        return {
+            "total_seconds": time.perf_counter() - self.started,
+            "phases": self.phases,
+            "requests": {
+                "count": self.requests,
+                "failed": self.failed_requests,
+                "cache_hits": self.cache_hits,
+                "bytes_received": self.bytes_received,
+                "mean_latency": self.latency_total / self.requests if self.requests else 0.0,
+                "latency_histogram": histogram,
+            },
+            "pages": self.pages,
+            "runs": self.runs,
+            "dropped_runs": self.dropped_runs,
+            "runs_per_second": self.runs_per_second(),
+            "xml_bytes": self.xml_bytes,
+            "profile": self.profile,
+        }
+
+    def dump(self, path):
+        """把统计信息写入JSON文件"""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def profiling(metrics, mode, output_path):
+    """可选的深入分析：mode为"cprofile"时保存.prof文件，为"tracemalloc"时记录内存分配热点"""
+    if mode == "cprofile":
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(output_path + ".prof")
+            metrics.profile = {"mode": mode, "stats_file": output_path + ".prof"}
+    elif mode == "tracemalloc":
+        import tracemalloc
+        tracemalloc.start()
+        try:
+            yield
+        finally:
+            snapshot = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            metrics.profile = {
+                "mode": mode,
+                "current_bytes": current,
+                "peak_bytes": peak,
+                "top": [str(stat) for stat in snapshot.statistics("lineno")[:15]],
+            }
+    else:
+        yield
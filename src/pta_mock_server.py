@@ -0,0 +1,312 @@
+# pta_mock_server.py
+import bisect
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pta_scheduler import TokenBucket
+
+SUBMISSION_ID_BASE = 1800000000000000000
+STATUSES = (
+    ("ACCEPTED", 35), ("WRONG_ANSWER", 30), ("TIME_LIMIT_EXCEEDED", 10), ("COMPILE_ERROR", 8),
+    ("RUNTIME_ERROR", 7), ("SEGMENTATION_FAULT", 4), ("MEMORY_LIMIT_EXCEEDED", 3),
+    ("PRESENTATION_ERROR", 2), ("OUTPUT_LIMIT_EXCEEDED", 1),
+)
+
+
+class SyntheticContest:
+    """按需生成的模拟比赛数据，提交记录不预先保存，内存占用与规模无关
+
+    practice为比赛时间外的练习提交数（一半在比赛前一天，一半在赛后30天内重新开放期间），
+    其中也包含非比赛成员的提交。
+    """
+
+    def __init__(self, teams=300, problems=12, submissions=20000, duration=18000,
+                 start_at="2025-05-16T00:00:00Z", problem_set_id="1", seed=0, practice=0):
+        self.team_count = teams
+        self.problem_count = problems
+        self.contest_submissions = submissions
+        self.practice_before = practice // 2
+        self.submission_count = submissions + practice
+        self.duration = duration
+        self.start_at = start_at
+        self.start = datetime.fromisoformat(start_at.replace("Z", "+00:00"))
+        self.problem_set_id = str(problem_set_id)
+        self.seed = seed
+        self._status_table = [name for name, weight in STATUSES for _ in range(weight)]
+        self._problem_index = None  # 题目ID -> 该题提交的下标列表（按题目筛选时才生成）
+        self._index_lock = threading.Lock()
+
+    def problem_set(self):
+        return {
+            "id": self.problem_set_id,
+            "name": f"模拟比赛{self.problem_set_id}",
+            "startAt": self.start_at,
+            "duration": self.duration,
+        }
+
+    def problem_id(self, idx):
+        return f"{self.problem_set_id}{idx:04d}"
+
+    def user_id(self, idx):
+        return f"{7000000 + idx}"
+
+    def submission(self, idx):
+        """第idx条提交（0为最早），由idx确定性地生成"""
+        rnd = random.Random(self.seed * 1000003 + idx)
+        users = self.team_count
+        contest_idx = idx - self.practice_before
+        if contest_idx < 0:
+            offset = -86400 * (-contest_idx - rnd.random()) / self.practice_before
+            users += max(1, self.team_count // 5)
+        elif contest_idx >= self.contest_submissions:
+            practice_after = self.submission_count - self.practice_before - self.contest_submissions
+            offset = self.duration + 30 * 86400 * (contest_idx - self.contest_submissions + rnd.random()) / practice_after
+            users += max(1, self.team_count // 5)
+        else:
+            offset = self.duration * (contest_idx + rnd.random()) / max(self.contest_submissions, 1)
+        submit_at = self.start + timedelta(seconds=offset)
+        return {
+            "id": str(SUBMISSION_ID_BASE + idx),
+            "userId": self.user_id(rnd.randrange(users)),
+            "problemSetProblemId": self.problem_id(rnd.randrange(self.problem_count)),
+            "submitAt": submit_at.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+            "status": rnd.choice(self._status_table),
+            "compiler": "GCC",
+        }
+
+    def submissions_page(self, before=None, limit=50, problem_id=None):
+        """before游标语义：返回ID小于before的最新limit条，由新到旧；给出problem_id时只返回该题的提交"""
+        end = self.submission_count
+        if before is not None:
+            end = max(0, min(end, int(before) - SUBMISSION_ID_BASE))
+        if problem_id is None:
+            indexes = range(end - 1, max(end - limit, 0) - 1, -1)
+            has_before = end - limit > 0
+        else:
+            problem_indexes = self._indexes_of(problem_id)
+            stop = bisect.bisect_left(problem_indexes, end)
+            indexes = problem_indexes[max(stop - limit, 0):stop][::-1]
+            has_before = stop - limit > 0
+        submissions = [self.submission(i) for i in indexes]
+        return {
+            "submissions": submissions,
+            "hasBefore": has_before,
+            "showDetailBySubmissionId": {sub["id"]: True for sub in submissions},
+        }
+
+    def submission_detail(self, submission_id):
+        """提交详情，源代码由提交确定性地生成；同一题的提交有不少内容完全相同（用于测试去重）"""
+        idx = int(submission_id) - SUBMISSION_ID_BASE
+        if not 0 <= idx < self.submission_count:
+            return None
+        sub = self.submission(idx)
+        variant = random.Random(self.seed * 1000003 + idx).randrange(8)
+        program = (f"// {sub['problemSetProblemId']} v{variant}\n#include <stdio.h>\n"
+                   f"int main() {{\n    int a, b;\n    scanf(\"%d%d\", &a, &b);\n"
+                   f"    printf(\"%d\\n\", a + b + {variant});\n    return 0;\n}}\n")
+        return {"submission": dict(sub, submissionDetails=[
+            {"programmingSubmissionDetail": {"program": program, "compiler": sub["compiler"]}},
+        ])}
+
+    def _indexes_of(self, problem_id):
+        with self._index_lock:
+            if self._problem_index is None:
+                index = {}
+                for i in range(self.submission_count):
+                    index.setdefault(self.submission(i)["problemSetProblemId"], []).append(i)
+                self._problem_index = index
+        return self._problem_index.get(problem_id, [])
+
+    def members_page(self, page=0, limit=1000):
+        indexes = range(page * limit, min((page + 1) * limit, self.team_count))
+        return {
+            "members": [{"userId": self.user_id(i), "studentUserId": f"s{i}"} for i in indexes],
+            "studentUserById": {f"s{i}": {"name": f"队伍{i + 1}"} for i in indexes},
+            "total": self.team_count,
+        }
+
+    def problems(self):
+        return {"problemSetProblems": [
+            {"id": self.problem_id(i), "label": chr(65 + i % 26), "title": f"题目{i + 1}"}
+            for i in range(self.problem_count)
+        ]}
+
+
+class MockPTAServer(ThreadingHTTPServer):
+    """本地模拟PTA接口的HTTP服务，支持注入延迟并统计请求数和流量
+
+    account_rate为每个账号（按PTASession Cookie区分）的速率上限，超过时返回429；
+    expired中的PTASession视为登录已失效，返回401。
+    """
+
+    daemon_threads = True
+
+    def __init__(self, contest, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, problem_sets=3,
+                 account_rate=None, expired=()):
+        super().__init__((host, port), MockPTAHandler)
+        self.contest = contest
+        self.latency = latency
+        self.jitter = jitter
+        self.problem_set_count = problem_sets
+        self.account_rate = account_rate
+        self.expired = set(expired)
+        self.request_count = 0
+        self.bytes_sent = 0
+        self.account_requests = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api"
+
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.request_count = 0
+            self.bytes_sent = 0
+            self.account_requests = {}
+
+    def allow(self, account):
+        """记录账号的一次请求，返回是否未超过该账号的速率上限"""
+        with self._lock:
+            self.account_requests[account] = self.account_requests.get(account, 0) + 1
+            if not self.account_rate:
+                return True
+            bucket = self._buckets.get(account)
+            if bucket is None:
+                bucket = self._buckets[account] = TokenBucket(self.account_rate, max(1, int(self.account_rate)))
+        return bucket.try_acquire() == 0
+
+    def record(self, size):
+        with self._lock:
+            self.request_count += 1
+            self.bytes_sent += size
+
+
+class MockPTAHandler(BaseHTTPRequestHandler):
+    """模拟PTA教师端接口"""
+
+    routes = (
+        (re.compile(r"^/api/problem-sets/admin$"), "_problem_sets"),
+        (re.compile(r"^/api/problem-sets/(\w+)$"), "_problem_set"),
+        (re.compile(r"^/api/problem-sets/(\w+)/exams$"), "_exams"),
+        (re.compile(r"^/api/problem-sets/(\w+)/preview/problems$"), "_problems"),
+        (re.compile(r"^/api/problem-sets/(\w+)/members$"), "_members"),
+        (re.compile(r"^/api/problem-sets/(\w+)/submissions$"), "_submissions"),
+        (re.compile(r"^/api/submissions/(\w+)$"), "_submission"),
+    )
+
+    def do_GET(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(server.latency + random.uniform(0, server.jitter))
+
+        cookie = SimpleCookie(self.headers.get("Cookie", "")).get("PTASession")
+        account = cookie.value if cookie else ""
+        if account in server.expired:
+            self._send(401, {"error": {"code": "AUTH_REQUIRED"}})
+            return
+        if not server.allow(account):
+            self._send(429, {"error": {"code": "TOO_MANY_REQUESTS"}}, {"Retry-After": "1"})
+            return
+
+        parsed = urlparse(self.path)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        for pattern, name in self.routes:
+            match = pattern.match(parsed.path)
+            if match:
+                data = getattr(self, name)(query, *match.groups())
+                if data is None:
+                    break
+                self._send(200, data)
+                return
+        self._send(404, {"error": {"code": "NOT_FOUND"}})
+
+    def _send(self, status, data, headers=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            status, body = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json;charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.record(len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def contest(self):
+        return self.server.contest
+
+    def _problem_sets(self, query):
+        page, limit = int(query.get("page", 0)), int(query.get("limit", 50))
+        ids = range(page * limit + 1, min((page + 1) * limit, self.server.problem_set_count) + 1)
+        return {"problemSets": [
+            {"id": str(i), "name": f"模拟比赛{i}", "startAt": self.contest.start_at} for i in ids
+        ], "total": self.server.problem_set_count}
+
+    def _problem_set(self, query, problem_set_id):
+        return {"problemSet": dict(self.contest.problem_set(), id=problem_set_id, name=f"模拟比赛{problem_set_id}")}
+
+    def _exams(self, query, problem_set_id):
+        return {"exam": {"problemSetId": problem_set_id}}
+
+    def _problems(self, query, problem_set_id):
+        return self.contest.problems()
+
+    def _members(self, query, problem_set_id):
+        return self.contest.members_page(int(query.get("page", 0)), int(query.get("limit", 1000)))
+
+    def _submissions(self, query, problem_set_id):
+        problem_id = json.loads(query.get("filter", "{}")).get("problemSetProblemId")
+        return self.contest.submissions_page(query.get("before"), int(query.get("limit", 50)), problem_id)
+
+    def _submission(self, query, submission_id):
+        return self.contest.submission_detail(submission_id)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地模拟PTA接口")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--teams", type=int, default=300)
+    parser.add_argument("--problems", type=int, default=12)
+    parser.add_argument("--submissions", type=int, default=20000)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的固定延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="额外随机延迟上限（秒）")
+    args = parser.parse_args()
+
+    mock_contest = SyntheticContest(args.teams, args.problems, args.submissions)
+    mock = MockPTAServer(mock_contest, port=args.port, latency=args.latency, jitter=args.jitter)
+    print(f"模拟PTA接口：{mock.base_url}")
+    try:
+        mock.serve_forever()
+    except KeyboardInterrupt:
+        pass
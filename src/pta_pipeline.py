@@ -0,0 +1,86 @@
+# pta_pipeline.py
+import heapq
+import queue
+import threading
+
+_DONE = object()
+
+
+def prefetch(iterable, depth=2):
+    """在后台线程中提前迭代iterable，最多缓冲depth项（depth<=0时不启用）
+
+    用于流水线化提交记录的处理：生产者线程负责请求和解析JSON，消费者同时入表、渲染上一页，
+    总耗时接近max(网络, CPU)而不是两者之和。队列有界，内存占用不随提交数增长。
+    生产者的异常会在消费者取到该位置时重新抛出；消费者提前结束（break或异常）时生产者随之停止。
+    """
+    if depth <= 0:
+        yield from iterable
+        return
+    yield from _drain(*_start(iterable, depth))
+
+
+def merge_batches(iterables, key, depth=2, reverse=False):
+    """并发迭代多个iterable并归并成一个有序序列
+
+    每个iterable产生一批批（列表）已按key排好序的数据，各自在一个后台线程中运行并最多缓冲depth批，
+    所有线程在第一次取值时同时启动。消费者提前结束时所有线程随之停止。
+    """
+    producers = [_start(iterable, depth) for iterable in iterables]
+    try:
+        yield from heapq.merge(*(_flatten(_drain(*producer)) for producer in producers),
+                               key=key, reverse=reverse)
+    finally:
+        for _, stopped in producers:
+            stopped.set()
+
+
+def _flatten(batches):
+    for batch in batches:
+        yield from batch
+
+
+def _start(iterable, depth):
+    """启动生产者线程，返回(有界队列, 停止标志)"""
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stopped = threading.Event()
+
+    def _put(item):
+        # 队列满时定期检查消费者是否已经结束，避免生产者永久阻塞
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not _put((item, None)):
+                    return
+            _put((_DONE, None))
+        except BaseException as e:
+            _put((_DONE, e))
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+    threading.Thread(target=_produce, name="pta-prefetch", daemon=True).start()
+    return buffer, stopped
+
+
+def _drain(buffer, stopped):
+    """按顺序取出生产者的结果，结束（包括提前关闭）时通知生产者停止"""
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
@@ -0,0 +1,130 @@
+# pta_scheduler.py
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """令牌桶限速器（线程安全）"""
+
+    def __init__(self, rate=4.0, burst=4):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        """取得一个令牌，令牌不足时阻塞等待"""
+        while True:
+            wait = self.try_acquire()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    def try_acquire(self):
+        """不等待地尝试取得一个令牌，成功返回0，否则返回还需等待的秒数"""
+        with self._lock:
+            self._refill()
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0
+            return (1 - self.tokens) / self.rate
+
+    def get_rate(self):
+        """当前速率（请求/秒）"""
+        return self.rate
+
+    def set_rate(self, rate):
+        """调整速率，已积累的令牌按旧速率结算"""
+        with self._lock:
+            self._refill()
+            self.rate = rate
+
+
+class RequestScheduler:
+    """请求调度器：令牌桶限速、429/5xx指数退避重试、重试预算以及自适应速率
+
+    速率按AIMD方式调整：请求成功时缓慢提高，被限流（429/503）时减半，
+    从而稳定在PTA能容忍的最高速率附近。
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+    THROTTLE_STATUS = (429, 503)
+
+    def __init__(self, rate=4.0, burst=4, min_rate=0.5, max_rate=20.0, adaptive=True,
+                 max_retries=5, retry_budget=20, backoff_base=0.5, backoff_max=30.0, limiter=None):
+        self.limiter = limiter if limiter is not None else TokenBucket(rate, burst)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.adaptive = adaptive
+        self.max_retries = max_retries
+        self.retry_budget = retry_budget
+        self.retry_tokens = retry_budget
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+
+    def get(self, session, url, **kwargs):
+        """通过session发送GET请求，必要时等待和重试"""
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            error = None
+            try:
+                resp = session.get(url, **kwargs)
+            except OSError as e:  # requests的网络异常均继承自IOError
+                resp, error = None, e
+
+            if resp is not None and resp.status_code not in self.RETRY_STATUS:
+                self._on_success()
+                return resp
+
+            if resp is not None and resp.status_code in self.THROTTLE_STATUS:
+                self._on_throttle()
+
+            if attempt >= self.max_retries or not self._take_retry_token():
+                if error is not None:
+                    raise error
+                return resp
+
+            time.sleep(self._backoff(attempt, resp))
+            attempt += 1
+
+    def _backoff(self, attempt, resp):
+        """指数退避（full jitter），服务端给出Retry-After时以其为下限"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after:
+            try:
+                delay = max(delay, min(self.backoff_max, float(retry_after)))
+            except ValueError:
+                pass
+        return delay
+
+    def _take_retry_token(self):
+        """消耗一次重试预算，预算耗尽时不再重试"""
+        with self._lock:
+            if self.retry_tokens < 1:
+                return False
+            self.retry_tokens -= 1
+            return True
+
+    def _on_success(self):
+        """成功时返还少量重试预算，并线性提高速率"""
+        with self._lock:
+            self.retry_tokens = min(self.retry_budget, self.retry_tokens + 0.1)
+        if self.adaptive and self.limiter is not None:
+            rate = self.limiter.get_rate()
+            self.limiter.set_rate(min(self.max_rate, rate + 1.0 / max(rate, 1.0)))
+
+    def _on_throttle(self):
+        """被限流时速率减半"""
+        if self.adaptive and self.limiter is not None:
+            self.limiter.set_rate(max(self.min_rate, self.limiter.get_rate() / 2))
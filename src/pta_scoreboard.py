@@ -0,0 +1,143 @@
+# pta_scoreboard.py
+import math
+from array import array
+
+# 默认奖牌比例：金/银/铜分别为有过题队伍数的10%/20%/30%（整数表示固定数量）
+DEFAULT_MEDALS = (0.1, 0.2, 0.3)
+
+
+class Scoreboard:
+    """ICPC规则的榜单计算
+
+    按提交时间顺序对所有run做一次增量遍历，维护每个队伍每道题的错误次数和通过时间，
+    同时得到封榜前榜单、最终榜单和按分钟记录的榜单变化（用于快速回放），耗时与run数成线性关系。
+    排名依次比较：通过题数（多者优先）、罚时（少者优先）、最后一次通过时间（早者优先）。
+    """
+
+    def __init__(self, team_ids, problem_count, duration_seconds, penalty_minutes=20, freeze_seconds=3600):
+        self.team_ids = list(team_ids)
+        self.problem_count = problem_count
+        self.duration_seconds = duration_seconds
+        self.penalty_minutes = penalty_minutes
+        self.freeze_seconds = freeze_seconds
+        self.freeze_at = max(0, duration_seconds - freeze_seconds)  # 封榜开始时间（相对比赛开始的秒数）
+
+        team_count = len(self.team_ids)
+        self._team_index = {team: i for i, team in enumerate(self.team_ids)}
+        cells = team_count * problem_count
+        self.attempts = array("I", bytes(4 * cells))   # 每队每题通过前计罚时的提交数
+        self.solved_at = array("i", [-1]) * cells       # 每队每题的通过时间（秒），-1表示未通过
+        self.solved = array("I", bytes(4 * team_count))
+        self.penalty = array("I", bytes(4 * team_count))  # 罚时（分钟）
+        self.last_solved = array("i", [-1]) * team_count  # 最后一次通过的时间（秒）
+        self.pending = array("I", bytes(4 * team_count))  # 封榜后的提交数（滚榜时待揭晓）
+        self.minute_changes = {}  # 分钟 -> [(队伍下标, 通过数, 罚时, 通过时间), ...]，只记录有变化的队伍
+        self.runs = 0
+        self._frozen = None
+        self._last_time = -1
+
+    def add_run(self, team, problem, seconds, solved, penalty):
+        """按时间顺序加入一次提交
+
+        problem为题目下标（从0开始），seconds为相对比赛开始的秒数，solved/penalty取自判题状态表。
+        不在队伍列表中、题目未知或不在比赛时间内的提交不计入榜单。
+        """
+        team_index = self._team_index.get(team)
+        if team_index is None or not 0 <= problem < self.problem_count:
+            return
+        if not 0 <= seconds < self.duration_seconds:
+            return
+        if seconds < self._last_time:
+            raise ValueError("提交必须按时间顺序加入榜单")
+        self._last_time = seconds
+        self.runs += 1
+
+        if seconds >= self.freeze_at:
+            if self._frozen is None:
+                self._freeze()
+            self.pending[team_index] += 1
+
+        cell = team_index * self.problem_count + problem
+        if self.solved_at[cell] >= 0:
+            return  # 已通过的题目不再计算
+        if not solved:
+            if penalty:
+                self.attempts[cell] += 1
+            return
+
+        self.solved_at[cell] = seconds
+        minute = seconds // 60
+        self.solved[team_index] += 1
+        self.penalty[team_index] += minute + self.attempts[cell] * self.penalty_minutes
+        self.last_solved[team_index] = seconds
+        self.minute_changes.setdefault(minute, []).append(
+            (team_index, self.solved[team_index], self.penalty[team_index], seconds)
+        )
+
+    def _freeze(self):
+        # 封榜时刻各队成绩的副本
+        self._frozen = (array("I", self.solved), array("I", self.penalty), array("i", self.last_solved))
+
+    def _rank(self, solved, penalty, last_solved):
+        order = sorted(range(len(self.team_ids)), key=lambda i: (-solved[i], penalty[i], last_solved[i], i))
+        standings = []
+        previous, rank = None, 0
+        for position, i in enumerate(order, 1):
+            key = (solved[i], penalty[i], last_solved[i])
+            if key != previous:
+                previous, rank = key, position
+            standings.append({"rank": rank, "team": self.team_ids[i], "solved": solved[i], "penalty": penalty[i]})
+        return standings
+
+    def final_standings(self):
+        """最终榜单"""
+        return self._rank(self.solved, self.penalty, self.last_solved)
+
+    def frozen_standings(self):
+        """封榜时的榜单（比赛期间未到封榜时间时即当前榜单）"""
+        if self._frozen is None:
+            return self.final_standings()
+        return self._rank(*self._frozen)
+
+    def standings_at(self, minute):
+        """回放到第minute分钟结束时的榜单"""
+        team_count = len(self.team_ids)
+        solved = array("I", bytes(4 * team_count))
+        penalty = array("I", bytes(4 * team_count))
+        last_solved = array("i", [-1]) * team_count
+        for change_minute in sorted(m for m in self.minute_changes if m <= minute):
+            for team_index, team_solved, team_penalty, seconds in self.minute_changes[change_minute]:
+                solved[team_index] = team_solved
+                penalty[team_index] = team_penalty
+                last_solved[team_index] = seconds
+        return self._rank(solved, penalty, last_solved)
+
+    def medal_cutoffs(self, medals=DEFAULT_MEDALS):
+        """计算(last_gold, last_silver, last_bronze)，即各奖牌的最后名次
+
+        medals中的小数表示占有过题队伍数的比例（向上取整），整数表示固定数量。
+        """
+        awarded = sum(1 for count in self.solved if count > 0)
+        cutoffs, total = [], 0
+        for value in medals:
+            total += math.ceil(awarded * value) if isinstance(value, float) else int(value)
+            cutoffs.append(min(total, awarded))
+        return tuple(cutoffs)
+
+    def to_dict(self, medals=DEFAULT_MEDALS):
+        """导出为可JSON序列化的字典"""
+        last_gold, last_silver, last_bronze = self.medal_cutoffs(medals)
+        return {
+            "penalty_minutes": self.penalty_minutes,
+            "freeze_at": self.freeze_at,
+            "runs": self.runs,
+            "medals": {"last_gold": last_gold, "last_silver": last_silver, "last_bronze": last_bronze},
+            "frozen": self.frozen_standings(),
+            "final": self.final_standings(),
+            "pending_runs": {self.team_ids[i]: n for i, n in enumerate(self.pending) if n},
+            "minute_changes": {
+                minute: [{"team": self.team_ids[i], "solved": solved, "penalty": penalty}
+                         for i, solved, penalty, _ in changes]
+                for minute, changes in sorted(self.minute_changes.items())
+            },
+        }
@@ -0,0 +1,241 @@
+# pta_server.py
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from pta_scheduler import RequestScheduler
+from pta_tool_class import API_BASE_URL, PTAContestGenerator
+
+
+class RenderedCache:
+    """按字节数限制大小的LRU缓存，保存渲染好的比赛输出"""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()  # 题目集ID -> (渲染时间, {"xml": bytes, "standings": bytes})
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _entry_size(outputs):
+        return sum(len(body) for body in outputs.values())
+
+    def get(self, key, max_age):
+        """返回(渲染时间, 输出)，不存在或超过max_age秒时返回None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > max_age:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, outputs, rendered_at):
+        """保存输出并淘汰最久未使用的条目；单个条目超过上限时不缓存"""
+        size = self._entry_size(outputs)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= self._entry_size(old[1])
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (rendered_at, outputs)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.size -= self._entry_size(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ContestExportService:
+    """多台机器共用的比赛导出服务
+
+    同一题目集的并发请求合并为一次上游导出（single-flight），结果在max_age秒内直接复用，
+    因此无论有多少客户端，PTA看到的都只是一个按max_age节奏刷新的使用者。
+    所有导出共用一个限速调度器、接口缓存和本地提交存储，每次导出使用独立的生成器。
+    cookies为Cookie列表时使用多账号会话池，各导出共用同一个池，此时rate为每个账号的速率。
+    """
+
+    def __init__(self, cookies, max_age=30, cache_bytes=256 * 1024 * 1024, base_url=API_BASE_URL,
+                 store_path=None, cache_path=None, max_exports=2, configure=None, rate=None):
+        self.cookies = cookies
+        self.rate = rate
+        self.max_age = max_age
+        self.base_url = base_url
+        self.configure = configure  # 对每个新生成器调用，用于套用命令行参数（如地区、分片数）
+        self.cache = RenderedCache(cache_bytes)
+        self.scheduler = RequestScheduler()
+        if rate and not isinstance(cookies, list):
+            self.scheduler.limiter.set_rate(rate)
+            self.scheduler.max_rate = rate
+        self.pool = None
+        self._template = self._new_generator()
+        if store_path:
+            self._template.set_submission_store(store_path)
+        if cache_path:
+            self._template.set_response_cache(cache_path)
+        self._inflight = {}  # 题目集ID -> Future，正在进行的导出
+        self._lock = threading.Lock()
+        self._exports = threading.BoundedSemaphore(max_exports)  # 同时进行的上游导出数上限
+        self.stats = {"requests": 0, "hits": 0, "coalesced": 0, "exports": 0, "failed": 0}
+
+    def _new_generator(self):
+        generator = PTAContestGenerator(base_url=self.base_url)
+        generator.scheduler = self.scheduler
+        if isinstance(self.cookies, list):
+            generator.set_cookies(self.cookies[0])
+            if self.pool is None:
+                self.pool = generator.set_accounts(self.cookies, rate=self.rate or 4.0)
+            generator.session = self.pool
+        else:
+            generator.set_cookies(self.cookies)
+        return generator
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, problem_set_id, max_age=None):
+        """返回(渲染时间, 输出, 是否命中缓存)，需要时等待或发起一次导出
+
+        max_age只能放宽（接受更旧的数据），小于服务配置的值按配置处理，单个客户端无法绕过缓存让请求打到PTA。
+        """
+        problem_set_id = str(problem_set_id)
+        max_age = self.max_age if max_age is None else max(max_age, self.max_age)
+        self._count("requests")
+        entry = self.cache.get(problem_set_id, max_age)
+        if entry is not None:
+            self._count("hits")
+            return entry + (True,)
+
+        with self._lock:
+            future = self._inflight.get(problem_set_id)
+            leader = future is None
+            if leader:
+                future = self._inflight[problem_set_id] = Future()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            return future.result() + (False,)
+
+        try:
+            with self._exports:
+                rendered_at = time.monotonic()  # 以开始导出的时间计算数据年龄
+                outputs = self._render(problem_set_id)
+            self.cache.put(problem_set_id, outputs, rendered_at)
+            future.set_result((rendered_at, outputs))
+            self._count("exports")
+        except Exception as e:
+            future.set_exception(e)
+            self._count("failed")
+        finally:
+            with self._lock:
+                del self._inflight[problem_set_id]
+        return future.result() + (False,)
+
+    def _render(self, problem_set_id):
+        """导出一次比赛，返回XML和榜单JSON"""
+        generator = self._new_generator()
+        generator.submission_store = self._template.submission_store
+        generator.response_cache = self._template.response_cache
+        if self.configure:
+            self.configure(generator)
+        generator.select_problem_set(problem_set_id)
+        fd, path = tempfile.mkstemp(prefix=f"pta_{problem_set_id}_", suffix=".xml")
+        os.close(fd)
+        try:
+            generator.generate_contest_xml(path, streaming=True)
+            with open(path, "rb") as f:
+                xml = f.read()
+        finally:
+            os.remove(path)
+        standings = generator.scoreboard.to_dict(generator.medals)
+        return {
+            "xml": xml,
+            "standings": json.dumps(standings, ensure_ascii=False).encode("utf-8"),
+        }
+
+    def snapshot_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats.update(cached=len(self.cache), cache_bytes=self.cache.size, max_age=self.max_age)
+        if self.scheduler.limiter is not None:
+            stats["rate"] = self.scheduler.limiter.get_rate()
+        if self.pool is not None:
+            stats["accounts"] = self.pool.status()
+        return stats
+
+
+class ContestExportServer(ThreadingHTTPServer):
+    """局域网内的比赛导出HTTP服务"""
+
+    daemon_threads = True
+
+    def __init__(self, service, host="0.0.0.0", port=8900):
+        super().__init__((host, port), ContestExportHandler)
+        self.service = service
+
+
+class ContestExportHandler(BaseHTTPRequestHandler):
+    """GET /contests/<id>.xml、/contests/<id>/standings.json、/stats"""
+
+    routes = (
+        (re.compile(r"^/contests/(\w+)\.xml$"), "xml", "application/xml;charset=UTF-8"),
+        (re.compile(r"^/contests/(\w+)/standings\.json$"), "standings", "application/json;charset=UTF-8"),
+    )
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path == "/stats":
+            self._send(200, json.dumps(self.server.service.snapshot_stats(), ensure_ascii=False).encode("utf-8"),
+                       "application/json;charset=UTF-8")
+            return
+        for pattern, output, content_type in self.routes:
+            match = pattern.match(parsed.path)
+            if match:
+                self._export(match.group(1), output, content_type, parse_qs(parsed.query))
+                return
+        self._error(404, "未知路径")
+
+    def _export(self, problem_set_id, output, content_type, query):
+        max_age = None
+        if "max_age" in query:
+            try:
+                max_age = float(query["max_age"][-1])
+            except ValueError:
+                self._error(400, "max_age必须是数字")
+                return
+        try:
+            rendered_at, outputs, hit = self.server.service.get(problem_set_id, max_age)
+        except Exception as e:
+            self._error(502, f"导出失败：{e}")
+            return
+        self._send(200, outputs[output], content_type, {
+            "Age": str(int(time.monotonic() - rendered_at)),
+            "X-Cache": "HIT" if hit else "MISS",
+        })
+
+    def _error(self, status, message):
+        body = json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json;charset=UTF-8")
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,125 @@
+# pta_session_pool.py
+import threading
+import time
+
+from pta_scheduler import TokenBucket
+
+
+class Account:
+    """会话池中的一个账号及其健康状态"""
+
+    def __init__(self, name, session, limiter=None):
+        self.name = name
+        self.session = session
+        self.limiter = limiter  # 账号自己的令牌桶，None表示不单独限速
+        self.disabled = None  # 失效原因，None表示仍在轮换中
+        self.cooldown_until = 0.0  # 被限流后暂停使用到该时刻（time.monotonic）
+        self.requests = 0
+        self.throttled = 0
+
+    def status(self):
+        return {
+            "name": self.name,
+            "active": self.disabled is None,
+            "disabled": self.disabled,
+            "cooling": max(0.0, self.cooldown_until - time.monotonic()),
+            "requests": self.requests,
+            "throttled": self.throttled,
+        }
+
+
+class SessionPool:
+    """多账号会话池：请求在各账号间轮流发送，每个账号单独限速，总吞吐随账号数增加
+
+    账号登录失效（401）时移出轮换；被限流（429）时暂停该账号cooldown秒（或按Retry-After），
+    请求立即换下一个账号重试。所有账号都失效时抛出异常。
+    与requests.Session一样提供get()，可直接交给RequestScheduler使用。
+    """
+
+    EXPIRED_STATUS = (401,)
+    THROTTLE_STATUS = (429,)
+
+    def __init__(self, sessions, rate=4.0, burst=4, cooldown=60.0, names=None):
+        if not sessions:
+            raise ValueError("会话池至少需要一个账号")
+        self.accounts = [
+            Account(names[i] if names else f"账号{i + 1}", session, TokenBucket(rate, burst) if rate else None)
+            for i, session in enumerate(sessions)
+        ]
+        self.cooldown = cooldown
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @property
+    def cookies(self):
+        """第一个账号的Cookie（兼容单会话的用法）"""
+        return self.accounts[0].session.cookies
+
+    def get(self, url, **kwargs):
+        """用一个可用账号发送GET请求；账号失效或被限流时换下一个账号，最多每个账号各试一次"""
+        resp = None
+        for _ in range(len(self.accounts)):
+            account = self._acquire()
+            resp = account.session.get(url, **kwargs)
+            if resp.status_code in self.EXPIRED_STATUS:
+                self._disable(account, f"登录失效（状态码{resp.status_code}）")
+            elif resp.status_code in self.THROTTLE_STATUS:
+                self._cool_down(account, resp)
+            else:
+                return resp
+        with self._lock:
+            self._check_active()
+        return resp
+
+    def _acquire(self):
+        """按轮换顺序选出第一个未暂停且有令牌的账号，都不可用时等待最早可用的那个"""
+        while True:
+            with self._lock:
+                count = len(self.accounts)
+                now = time.monotonic()
+                wait = None
+                for i in range(count):
+                    account = self.accounts[(self._next + i) % count]
+                    if account.disabled is not None:
+                        continue
+                    delay = account.cooldown_until - now
+                    if delay <= 0 and account.limiter is not None:
+                        delay = account.limiter.try_acquire()
+                    if delay <= 0:
+                        self._next = (self._next + i + 1) % count
+                        account.requests += 1
+                        return account
+                    wait = delay if wait is None else min(wait, delay)
+                self._check_active()
+            time.sleep(wait)
+
+    def _check_active(self):
+        """所有账号都已移出轮换时抛出异常（调用方持有锁）"""
+        if all(account.disabled is not None for account in self.accounts):
+            reasons = "；".join(f"{a.name}{a.disabled}" for a in self.accounts)
+            raise Exception(f"所有账号均已失效：{reasons}")
+
+    def _disable(self, account, reason):
+        with self._lock:
+            account.disabled = reason
+
+    def _cool_down(self, account, resp):
+        delay = self.cooldown
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                pass
+        with self._lock:
+            account.throttled += 1
+            account.cooldown_until = max(account.cooldown_until, time.monotonic() + delay)
+
+    def status(self):
+        """各账号的状态和请求数"""
+        with self._lock:
+            return [account.status() for account in self.accounts]
+
+    def close(self):
+        for account in self.accounts:
+            account.session.close()
@@ -0,0 +1,126 @@
+# pta_snapshot.py
+import json
+import mmap
+import struct
+import sys
+import zlib
+from array import array
+
+from pta_columns import SubmissionTable
+
+# 文件结构：文件头 | 段目录 | 各段数据（zlib压缩）
+#   文件头：魔数、格式版本、段数
+#   段目录：每段的名称、在文件中的偏移、压缩后长度、原始长度
+# META段为JSON（比赛信息、题目、队伍、编码表），其余段为提交表的各列
+MAGIC = b"PTAS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHH")
+_SECTION = struct.Struct("<4sQQQ")
+_COLUMN_SECTIONS = {"team": b"TEAM", "problem": b"PROB", "submit_us": b"TIME", "status": b"STAT"}
+
+
+def write_snapshot(path, problem_set, problem_ids, teams, table, level=6):
+    """把规范化后的比赛数据保存为压缩的二进制快照
+
+    problem_set为题目集信息（id、name、startAt、duration），problem_ids按题号顺序排列，
+    teams为[{"id", "name"}]，table为SubmissionTable。
+    """
+    meta = {
+        "problem_set": problem_set,
+        "problems": list(problem_ids),
+        "teams": teams,
+        "team_codes": table.teams,
+        "statuses": table.statuses,
+        "rows": len(table),
+        "byteorder": sys.byteorder,
+        "columns": {name: [getattr(table, name).typecode, getattr(table, name).itemsize]
+                    for name in SubmissionTable.COLUMNS},
+    }
+    sections = [(b"META", json.dumps(meta, ensure_ascii=False).encode("utf-8")),
+                (b"IDS_", "\n".join(table.ids).encode("ascii"))]
+    sections += [(_COLUMN_SECTIONS[name], getattr(table, name).tobytes()) for name in SubmissionTable.COLUMNS]
+
+    offset = _HEADER.size + _SECTION.size * len(sections)
+    directory, payloads = [], []
+    for name, raw in sections:
+        data = zlib.compress(raw, level)
+        directory.append(_SECTION.pack(name, offset, len(data), len(raw)))
+        payloads.append(data)
+        offset += len(data)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, len(sections)))
+        f.writelines(directory)
+        f.writelines(payloads)
+
+
+class ContestSnapshot:
+    """只读的比赛快照，通过内存映射按需解压各段，不必一次读入整个文件"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, count = _HEADER.unpack_from(self._map, 0)
+        except struct.error:
+            magic, version, count = None, None, 0
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"不是比赛快照文件：{path}")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"不支持的快照版本：{version}（当前版本{VERSION}）")
+
+        self._sections = {}
+        for i in range(count):
+            name, offset, length, raw_length = _SECTION.unpack_from(self._map, _HEADER.size + i * _SECTION.size)
+            self._sections[name] = (offset, length, raw_length)
+        self.meta = json.loads(self._read(b"META"))
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _read(self, name):
+        offset, length, raw_length = self._sections[name]
+        raw = zlib.decompress(self._map[offset:offset + length])
+        if len(raw) != raw_length:
+            raise ValueError(f"快照数据损坏：{name.decode()}段长度不符")
+        return raw
+
+    @property
+    def problem_set(self):
+        return self.meta["problem_set"]
+
+    @property
+    def problem_ids(self):
+        return self.meta["problems"]
+
+    @property
+    def teams(self):
+        return self.meta["teams"]
+
+    def column(self, name):
+        """解压一列提交数据"""
+        typecode, itemsize = self.meta["columns"][name]
+        values = array(typecode)
+        if values.itemsize != itemsize:
+            raise ValueError(f"快照的{name}列与当前平台的数据宽度不一致")
+        values.frombytes(self._read(_COLUMN_SECTIONS[name]))
+        if self.meta["byteorder"] != sys.byteorder:
+            values.byteswap()
+        return values
+
+    def submission_table(self, label_map):
+        """还原列式提交表"""
+        raw_ids = self._read(b"IDS_").decode("ascii")
+        ids = raw_ids.split("\n") if raw_ids else []
+        columns = {name: self.column(name) for name in SubmissionTable.COLUMNS}
+        return SubmissionTable.from_columns(label_map, ids, columns,
+                                            self.meta["team_codes"], self.meta["statuses"])
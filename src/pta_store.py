@@ -0,0 +1,155 @@
+# pta_store.py
+import json
+import sqlite3
+import threading
+
+# 尚未出结果的判题状态，同步时需要重新拉取
+PENDING_STATUSES = ("WAITING", "JUDGING", "REJUDGING", "PENDING")
+
+
+def submission_key(submission_id):
+    """提交ID排序键（数字字符串按数值大小比较）"""
+    submission_id = str(submission_id)
+    return len(submission_id), submission_id
+
+
+class SubmissionStore:
+    """本地提交记录存储（SQLite），按题目集和提交ID保存，支持增量同步和断点续传"""
+
+    def __init__(self, path="pta_submissions.db"):
+        self.path = path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._create_tables()
+
+    def _create_tables(self):
+        """初始化数据表"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS submissions ("
+                " problem_set_id TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " status TEXT,"
+                " data TEXT NOT NULL,"
+                " PRIMARY KEY (problem_set_id, id)"
+                ") WITHOUT ROWID"
+            )
+            # newest_id: 已完整同步的最新提交ID
+            # pending_*: 正在进行（可能被中断）的一次同步
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " problem_set_id TEXT PRIMARY KEY,"
+                " newest_id TEXT,"
+                " pending_top TEXT,"
+                " pending_cursor TEXT,"
+                " pending_stop TEXT"
+                ")"
+            )
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def get_state(self, problem_set_id):
+        """读取同步状态"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT newest_id, pending_top, pending_cursor, pending_stop"
+                " FROM sync_state WHERE problem_set_id = ?",
+                (str(problem_set_id),)
+            ).fetchone()
+        keys = ("newest_id", "pending_top", "pending_cursor", "pending_stop")
+        return dict(zip(keys, row)) if row else dict.fromkeys(keys)
+
+    def stop_id(self, problem_set_id):
+        """增量同步的停止位置：已同步的最新ID与最早未出结果的提交取较早者
+
+        同步时保存不早于该ID的提交，遇到更早的提交即停止翻页。
+        """
+        state = self.get_state(problem_set_id)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id FROM submissions WHERE problem_set_id = ? AND status IN (%s)"
+                % ",".join("?" * len(PENDING_STATUSES)),
+                (str(problem_set_id),) + PENDING_STATUSES
+            ).fetchall()
+        candidates = [r[0] for r in rows]
+        if state["newest_id"]:
+            candidates.append(state["newest_id"])
+        return min(candidates, key=submission_key) if candidates else None
+
+    def begin_sync(self, problem_set_id, top_id, stop_id):
+        """记录一次新的同步"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO sync_state (problem_set_id, pending_top, pending_cursor, pending_stop)"
+                " VALUES (?, ?, NULL, ?)"
+                " ON CONFLICT(problem_set_id) DO UPDATE SET"
+                " pending_top = excluded.pending_top, pending_cursor = NULL,"
+                " pending_stop = excluded.pending_stop",
+                (str(problem_set_id), top_id, stop_id)
+            )
+
+    def save_page(self, problem_set_id, submissions, cursor):
+        """保存一页提交记录，并在同一事务中更新续传游标"""
+        rows = [
+            (str(problem_set_id), str(sub["id"]), sub.get("status"),
+             json.dumps(sub, ensure_ascii=False, separators=(",", ":")))
+            for sub in submissions
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO submissions (problem_set_id, id, status, data)"
+                " VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self.conn.execute(
+                "UPDATE sync_state SET pending_cursor = ? WHERE problem_set_id = ?",
+                (cursor, str(problem_set_id))
+            )
+
+    def finish_sync(self, problem_set_id):
+        """同步完成，提交最新ID并清除续传信息"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE sync_state SET newest_id = pending_top, pending_top = NULL,"
+                " pending_cursor = NULL, pending_stop = NULL"
+                " WHERE problem_set_id = ? AND pending_top IS NOT NULL",
+                (str(problem_set_id),)
+            )
+
+    def count(self, problem_set_id):
+        """已保存的提交数量"""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM submissions WHERE problem_set_id = ?",
+                (str(problem_set_id),)
+            ).fetchone()[0]
+
+    def iter_submissions(self, problem_set_id, batch_size=5000):
+        """按提交ID从新到旧遍历已保存的提交
+
+        按主键分批读取（每批batch_size条，只在读取每批时持有锁），内存占用与提交总数无关。
+        ID按数值排序：先按长度分组，同一长度内字符串顺序即数值顺序。
+        """
+        problem_set_id = str(problem_set_id)
+        with self._lock:
+            lengths = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT length(id) FROM submissions WHERE problem_set_id = ? ORDER BY 1 DESC",
+                (problem_set_id,)
+            )]
+        for length in lengths:
+            last_id = None
+            while True:
+                with self._lock:
+                    rows = self.conn.execute(
+                        "SELECT id, data FROM submissions WHERE problem_set_id = ? AND length(id) = ?"
+                        + (" AND id < ?" if last_id is not None else "")
+                        + " ORDER BY id DESC LIMIT ?",
+                        (problem_set_id, length) + ((last_id,) if last_id is not None else ()) + (batch_size,)
+                    ).fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                for _, data in rows:
+                    yield json.loads(data)
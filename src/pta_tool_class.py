@@ -1,23 +1,130 @@
-import xml.etree.ElementTree as ET
-from datetime import datetime, timezone
-import requests
+from datetime import datetime
+import hashlib
+from itertools import islice
+import json
+import os
+import threading
+import time
+from urllib.parse import quote
+from pta_cache import DEFAULT_TTLS, ResponseCache
+from pta_columns import SubmissionTable, to_epoch_us
+from pta_metrics import ExportMetrics, profiling
+from pta_pipeline import merge_batches, prefetch
+from pta_scheduler import RequestScheduler
+from pta_scoreboard import DEFAULT_MEDALS, Scoreboard
+from pta_session_pool import SessionPool
+from pta_snapshot import ContestSnapshot, write_snapshot
+from pta_store import SubmissionStore, submission_key
+from pta_xml_writer import StreamingXMLWriter, TreeXMLWriter, indent
+
+API_BASE_URL = "https://pintia.cn/api"
 
 
 class PTAContestGenerator:
-    def __init__(self):  # 修改构造函数
-        self.session = requests.Session()
+    # run节点的子节点顺序
+    RUN_FIELDS = ("id", "judged", "language", "problem", "status", "team", "time", "timestamp",
+                  "solved", "penalty", "result")
+
+    # 判罚类型，run的solved/penalty和榜单计算均以此为准；未列出的状态按不通过、计罚时处理
+    JUDGEMENTS = [
+        {"id": "1", "acronym": "ACCEPTED", "name": "ACCEPTED", "solved": "true", "penalty": "false"},
+        {"id": "2", "acronym": "SEGMENTATION_FAULT", "name": "SEGMENTATION_FAULT", "solved": "false","penalty": "true"},
+        {"id": "3", "acronym": "WRONG_ANSWER", "name": "WRONG_ANSWER", "solved": "false", "penalty": "true"},
+        {"id": "4", "acronym": "TIME_LIMIT_EXCEEDED", "name": "TIME_LIMIT_EXCEEDED", "solved": "false","penalty": "true"},
+        {"id": "5", "acronym": "COMPILE_ERROR", "name": "COMPILE_ERROR", "solved": "false", "penalty": "false"},
+        {"id": "6", "acronym": "FLOAT_POINT_EXCEPTION", "name": "FLOAT_POINT_EXCEPTION", "solved": "false","penalty": "true"},
+        {"id": "7", "acronym": "MEMORY_LIMIT_EXCEEDED", "name": "MEMORY_LIMIT_EXCEEDED", "solved": "false","penalty": "true"},
+        {"id": "8", "acronym": "NON_ZERO_EXIT_CODE", "name": "NON_ZERO_EXIT_CODE", "solved": "false","penalty": "true"},
+        {"id": "9", "acronym": "RUNTIME_ERROR", "name": "RUNTIME_ERROR", "solved": "false", "penalty": "true"},
+        {"id": "10", "acronym": "PRESENTATION_ERROR", "name": "PRESENTATION_ERROR", "solved": "false","penalty": "true"},
+        {"id": "11", "acronym": "OUTPUT_LIMIT_EXCEEDED", "name": "OUTPUT_LIMIT_EXCEEDED", "solved": "false","penalty": "true"}
+    ]
+
+    # 编程语言
+    LANGUAGES = [("1", "c"), ("2", "c++"), ("3", "java"), ("4", "python")]
+
+    def __init__(self, max_workers=3, base_url=API_BASE_URL):  # 修改构造函数
+        self._session = None
+        self._cookies = {}
+        self.base_url = base_url.rstrip("/")
         self.selected_problem_set_id = None
         self.contest_root = None
+        self.xml_writer = None
         self.label_map = {}
         self.exam_info = {}
-        self._configure_session()
+        self.submission_store = None
+        self.sync_on_export = True  # 导出时是否先同步本地存储
+        self.max_workers = max_workers  # 元数据并发请求数上限
+        self.member_page_size = 200  # 成员列表每页数量
+        self.prefetch_pages = 2  # 处理当前页时后台预取的提交记录页数，0表示不预取
+        self.filter_window = True  # 只保留比赛时间内、比赛成员的提交，翻到比赛开始前即停止
+        self.shard_workers = 4  # 按题目分片并发获取提交记录时同时进行的请求数，1表示逐页顺序获取
+        self.teams = []
+        self.submission_table = None
+        self.penalty_minutes = 20  # 每次错误提交的罚时（分钟）
+        self.freeze_seconds = 3600  # 封榜时长（秒）
+        self.medals = DEFAULT_MEDALS  # 金/银/铜数量：小数为占有过题队伍的比例，整数为固定数量
+        self.region = "HBUE"  # 地区名称
+        self.university = "HBUE"  # 队伍所属学校
+        self.scoreboard = None
+        self.scheduler = RequestScheduler()  # 限速与重试
+        self.response_cache = None
+        self.metrics = ExportMetrics()
+        self.progress_callback = None  # 进度回调，参数为ExportMetrics生成的事件字典
+        self._refresh = False
+
+    @property
+    def session(self):
+        """HTTP会话，首次发请求时才创建（避免启动时导入requests）"""
+        if self._session is None:
+            self._session = self._new_session(self._cookies)
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def _new_session(self, cookies):
+        import requests
+        session = requests.Session()
+        self._configure_session(session)
+        session.cookies.update(cookies)
+        return session
 
     def set_cookies(self, cookies):
-        """更新会话的Cookie信息"""
-        self.session.cookies.update(cookies)
-
-
-    def _configure_session(self):
+        """更新会话的Cookie信息（使用多账号时更新第一个账号）"""
+        self._cookies.update(cookies)
+        if self._session is not None:
+            self._session.cookies.update(cookies)
+
+    def set_accounts(self, cookie_sets, rate=4.0):
+        """使用多个账号的Cookie轮流发送请求，失效或被限流的账号自动移出轮换
+
+        rate为每个账号的请求速率，此时不再使用调度器的全局限速；
+        为None时账号不单独限速，总速率仍由调度器的限速器控制。
+        接口缓存按第一个账号分区，各账号应能访问相同的题目集。
+        """
+        if self._session is not None:
+            self._session.close()
+        self._cookies = dict(cookie_sets[0])
+        self._session = SessionPool([self._new_session(cookies) for cookies in cookie_sets], rate=rate)
+        if rate is not None:
+            self.scheduler.limiter = None
+        return self._session
+
+    def set_submission_store(self, path):
+        """启用本地提交记录存储，重复导出时只拉取新提交"""
+        if self.submission_store is not None:
+            self.submission_store.close()
+        self.submission_store = SubmissionStore(path) if path else None
+
+    def set_response_cache(self, path, max_bytes=64 * 1024 * 1024, ttls=DEFAULT_TTLS):
+        """启用接口响应的本地磁盘缓存（题目集列表、题目、成员等基本不变的数据），ttls为各接口的有效期"""
+        if self.response_cache is not None:
+            self.response_cache.close()
+        self.response_cache = ResponseCache(path, max_bytes, ttls) if path else None
+
+    def _configure_session(self, session=None):
         """配置会话参数"""
         headers = \
             {
@@ -26,57 +133,88 @@ class PTAContestGenerator:
                 "Accept": "application/json, text/plain, */*"
             }
 
-        self.session.headers.update(headers)
+        (self.session if session is None else session).headers.update(headers)
+
+    def _get(self, url, refresh=False):
+        """经调度器发送GET请求（限速、退避重试），可缓存的接口优先使用本地缓存
+
+        refresh=True时跳过缓存直接请求，并用新结果更新缓存。
+        """
+        cache = self.response_cache
+        if cache is None or cache.ttl_for(url) is None:
+            return self._request(url)
+
+        scope = self._cache_scope()
+        cached, fresh, headers = (None, False, {}) if refresh or self._refresh else cache.lookup(url, scope)
+        if fresh:
+            self.metrics.record_cache_hit()
+            return cached
+
+        resp = self._request(url, headers=headers)
+        if resp.status_code == 304 and cached is not None:
+            cache.renew(url, scope)
+            return cached
+        if resp.status_code == 200:
+            cache.store(url, resp, scope)
+        return resp
+
+    def _request(self, url, **kwargs):
+        """发送请求并记录耗时和流量"""
+        started = time.perf_counter()
+        try:
+            resp = self.scheduler.get(self.session, url, **kwargs)
+        except Exception:
+            self.metrics.record_request(url, None, time.perf_counter() - started, 0)
+            raise
+        self.metrics.record_request(url, resp.status_code, time.perf_counter() - started, len(resp.content))
+        return resp
+
+    def _cache_scope(self):
+        """当前账号的缓存分区（Cookie摘要）"""
+        cookies = sorted(self._cookies.items())
+        return hashlib.sha1(repr(cookies).encode("utf-8")).hexdigest()
+
+    def _get_json(self, url):
+        """发送GET请求并解析JSON，失败时抛出异常"""
+        resp = self._get(url)
+        if resp.status_code != 200:
+            raise Exception(f"请求失败，状态码：{resp.status_code}")
+        return resp.json()
 
     @staticmethod
     def generate_letters(n):
         """生成题目字母序号"""
         return [chr(65 + i) for i in range(n)]
 
-    @staticmethod
-    def indent(elem, level=0):
-        """XML格式化工具"""
-        i = "\n" + level * "  "
-        if len(elem):
-            if not elem.text or not elem.text.strip():
-                elem.text = i + "  "
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-            for child in elem:
-                PTAContestGenerator.indent(child, level + 1)
-            if not elem.tail or not elem.tail.strip():
-                elem.tail = i
-        else:
-            if level and (not elem.tail or not elem.tail.strip()):
-                elem.tail = i
+    indent = staticmethod(indent)
+
+    def get_problem_sets(self, refresh=False):
+        """获取所有可用题目集，refresh=True时忽略本地缓存"""
+        return [ps for page in self.iter_problem_sets(refresh) for ps in page]
 
-    def get_problem_sets(self):
-        """获取所有可用题目集"""
-        all_sets = []
+    def iter_problem_sets(self, refresh=False):
+        """逐页获取题目集，每取到一页就返回该页的列表（界面可边加载边显示）"""
         page = 0
         limit = 50
 
         while True:
-            url = f"https://pintia.cn/api/problem-sets/admin?sort_by=%7B%22type%22%3A%22UPDATE_AT%22%2C%22asc%22%3Afalse%7D&page={page}&limit={limit}&filter=%7B%22ownerId%22%3A%220%22%7D"
-            resp = self.session.get(url)
-            print(self.session.cookies.get_dict())
+            url = f"{self.base_url}/problem-sets/admin?sort_by=%7B%22type%22%3A%22UPDATE_AT%22%2C%22asc%22%3Afalse%7D&page={page}&limit={limit}&filter=%7B%22ownerId%22%3A%220%22%7D"
+            resp = self._get(url, refresh)
             if resp.status_code != 200:
                 raise Exception(f"请求失败，状态码：{resp.status_code}")
 
             data = resp.json()
             current = data.get("problemSets", [])
-            all_sets.extend(current)
+            yield [{
+                "name": ps.get("name", "未命名题目集"),
+                "id": ps.get("id"),
+                "start_time": ps.get("startAt"),
+            } for ps in current]
 
             if len(current) < limit:
                 break
             page += 1
 
-        return [{
-            "name": ps.get("name", "未命名题目集"),
-            "id": ps.get("id"),
-            "start_time": ps.get("startAt"),
-        } for ps in all_sets]
-
     def select_problem_set(self, problem_set_id):
         """选择目标题目集"""
         self.selected_problem_set_id = problem_set_id
@@ -86,26 +224,115 @@ class PTAContestGenerator:
         """验证题目集有效性"""
         if not self.selected_problem_set_id:
             raise ValueError("未选择题目集")
-        test_url = f"https://pintia.cn/api/problem-sets/{self.selected_problem_set_id}/exams"
-        resp = self.session.get(test_url)
+        # 与_fetch_exam_info使用同一接口，导出时可直接命中缓存
+        test_url = f"{self.base_url}/problem-sets/{self.selected_problem_set_id}"
+        resp = self._get(test_url)
         if resp.status_code != 200:
             raise ValueError("无效的题目集ID")
 
-    def generate_contest_xml(self, output_path="contest.xml"):
-        """生成比赛XML文件"""
-        self._init_xml_structure()
-        self._process_exam_info()
-        self._add_static_nodes()
-        self._process_problems()
-        self._process_teams()
-        self._process_submissions()
-        self._add_finalized_node()
-        self._save_xml(output_path)
+    def generate_contest_xml(self, output_path="contest.xml", streaming=False, refresh=False, profile=None):
+        """生成比赛XML文件
+
+        streaming=True时边生成边写入文件，不在内存中保留整棵XML树，输出内容与默认方式一致。
+        refresh=True时忽略本地缓存，重新获取所有数据。
+        profile为"cprofile"或"tracemalloc"时额外记录性能分析结果（见self.metrics.profile）。
+        各阶段的统计信息保存在self.metrics中，进度通过self.progress_callback通知。
+        """
+        self.metrics = metrics = ExportMetrics(self.progress_callback)
+        self._init_xml_structure(output_path, streaming)
+        self._refresh = refresh
+        try:
+            with profiling(metrics, profile, output_path):
+                with metrics.phase("metadata"):
+                    exam_info, problem_data, teams = self._fetch_metadata()
+                with metrics.phase("render_metadata"):
+                    self._process_exam_info(exam_info)
+                    self._add_static_nodes()
+                    self._process_problems(problem_data)
+                    self._process_teams(teams)
+                with metrics.phase("submissions"):
+                    self._process_submissions()
+                with metrics.phase("finalize"):
+                    self._add_finalized_node()
+        except BaseException:
+            self.xml_writer.abort()  # 保留已有的输出文件，不写入不完整的XML
+            raise
+        finally:
+            self._refresh = False
+        with metrics.phase("save"):
+            self._save_xml(output_path)
+        metrics.xml_bytes = os.path.getsize(output_path)
         return output_path
 
-    def _init_xml_structure(self):
+    def save_snapshot(self, path):
+        """把最近一次导出的比赛数据（比赛信息、题目、队伍、提交）保存为快照，之后可离线重新生成XML"""
+        if self.submission_table is None:
+            raise ValueError("请先生成一次比赛XML")
+        problem_set = self.exam_info.get("problemSet", {})
+        problem_ids = sorted(self.label_map, key=lambda pid: int(self.label_map[pid]["xml_id"]))
+        write_snapshot(path, {key: problem_set.get(key) for key in ("id", "name", "startAt", "duration")},
+                       problem_ids, self.teams, self.submission_table)
+        return path
+
+    def render_snapshot(self, snapshot_path, output_path="contest.xml", streaming=True, profile=None):
+        """只根据快照重新生成XML，不发送任何请求
+
+        地区、学校、判罚类型、语言、罚时、封榜和奖牌设置取生成器当前的配置，
+        输出路径以.gz结尾时写入gzip压缩的XML。
+        """
+        if os.path.abspath(output_path) == os.path.abspath(snapshot_path):
+            raise ValueError("输出文件不能与快照文件相同")
+        self.metrics = metrics = ExportMetrics(self.progress_callback)
+        # 先读取快照再创建输出文件，快照无效时不会留下空文件
+        with metrics.phase("load"):
+            with ContestSnapshot(snapshot_path) as snapshot:
+                exam_info = {"problemSet": snapshot.problem_set}
+                problem_data = {"problemSetProblems": [{"id": pid} for pid in snapshot.problem_ids]}
+                teams = snapshot.teams
+                table = snapshot.submission_table(self._build_label_map(problem_data["problemSetProblems"]))
+        self.selected_problem_set_id = exam_info["problemSet"].get("id")
+
+        self._init_xml_structure(output_path, streaming)
+        try:
+            with profiling(metrics, profile, output_path):
+                with metrics.phase("render_metadata"):
+                    self._process_exam_info(exam_info)
+                    self._add_static_nodes()
+                    self._process_problems(problem_data)
+                    self._process_teams(teams)
+                with metrics.phase("submissions"):
+                    self.submission_table = table
+                    contest_start_us = to_epoch_us(self.exam_info["problemSet"]["startAt"])
+                    for start in range(0, len(table), 5000):
+                        stop = min(start + 5000, len(table))
+                        self._add_run_nodes(table, start, contest_start_us, stop)
+                        metrics.record_page(stop - start)
+                with metrics.phase("finalize"):
+                    self._add_finalized_node()
+        except BaseException:
+            self.xml_writer.abort()  # 保留已有的输出文件，不写入不完整的XML
+            raise
+        with metrics.phase("save"):
+            self._save_xml(output_path)
+        metrics.xml_bytes = os.path.getsize(output_path)
+        return output_path
+
+    def _init_xml_structure(self, output_path="contest.xml", streaming=False):
         """初始化XML根节点"""
-        self.contest_root = ET.Element("contest")
+        if streaming:
+            self.xml_writer = StreamingXMLWriter(output_path)
+            self.contest_root = None
+        else:
+            self.xml_writer = TreeXMLWriter(output_path)
+            self.contest_root = self.xml_writer.root
+
+    def _add_node(self, tag, fields):
+        """添加一个contest下的二级节点"""
+        self.xml_writer.add(tag, fields)
+
+    def _add_nodes(self, tag, keys, rows):
+        """批量添加结构相同的二级节点"""
+        self.xml_writer.add_rows(tag, keys, rows)
 
     # def _process_exam_info(self):
     #     """处理考试基础信息"""
@@ -130,207 +357,447 @@ class PTAContestGenerator:
     #     ET.SubElement(info, "short-title").text = self.exam_info.get("short_title", "Default Contest")
     #     ET.SubElement(info, "scoreboard-freeze-length").text = self.exam_info.get("freeze_duration", "1:00:00") # 封榜时间 自定义设置
     #     ET.SubElement(info, "contest-id").text = self.exam_info.get("id", "default-id")
-    def _process_exam_info(self):
-        """处理考试基础信息"""
+    def _fetch_metadata(self):
+        """并发获取比赛信息、题目和成员数据，按固定顺序返回"""
+        fetchers = (self._fetch_exam_info, self._fetch_problems, self._fetch_teams)
+        if self.max_workers <= 1:
+            return [fetch() for fetch in fetchers]
+
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(fetchers))) as pool:
+            futures = [pool.submit(fetch) for fetch in fetchers]
+            return [future.result() for future in futures]
+
+    def _fetch_exam_info(self):
+        """获取考试基础信息"""
         # url = f'https://pintia.cn/api/problem-sets/{self.selected_problem_set_id}/exams' 为学生端接口
-        url = f'https://pintia.cn/api/problem-sets/{self.selected_problem_set_id}'
-        resp = self.session.get(url)
-        self.exam_info = resp.json()
+        url = f'{self.base_url}/problem-sets/{self.selected_problem_set_id}'
+        return self._get_json(url)
 
-        info = ET.SubElement(self.contest_root, "info")
+    def _process_exam_info(self, exam_info):
+        """处理考试基础信息"""
+        self.exam_info = exam_info
         problem_set = self.exam_info.get("problemSet", {})
 
         # 时间处理
         start_at = problem_set.get("startAt", "2025-05-16T00:00:00Z")
         start_time = datetime.fromisoformat(start_at.replace('Z', '+00:00')).timestamp()
 
-        # 持续时间处理（从秒转换为时:分:秒格式）
-        duration_seconds = problem_set.get("duration", 14400)  # 获取持续时间（秒）
-        hours = duration_seconds // 3600
-        minutes = (duration_seconds % 3600) // 60
-        seconds = duration_seconds % 60
-        duration_str = f"{hours}:{minutes:02d}:{seconds:02d}"
-
         # 添加子节点
-        ET.SubElement(info, "length").text = duration_str
-        ET.SubElement(info, "penalty").text = str(20)  # 罚时自定义设置，默认20分钟
-        ET.SubElement(info, "started").text = "False"
-        ET.SubElement(info, "starttime").text = f"{start_time:.1f}"
-        ET.SubElement(info, "title").text = problem_set.get("name", "默认比赛")
-        ET.SubElement(info, "short-title").text = problem_set.get("name", "Default Contest")
-        ET.SubElement(info, "scoreboard-freeze-length").text = "1:00:00"  # 封榜时间自定义设置，默认1小时
-        ET.SubElement(info, "contest-id").text = str(problem_set.get("id", "default-id"))
+        self._add_node("info", {
+            "length": self.format_duration(self._contest_duration()),
+            "penalty": str(self.penalty_minutes),  # 罚时自定义设置，默认20分钟
+            "started": "False",
+            "starttime": f"{start_time:.1f}",
+            "title": problem_set.get("name", "默认比赛"),
+            "short-title": problem_set.get("name", "Default Contest"),
+            "scoreboard-freeze-length": self.format_duration(self.freeze_seconds),  # 封榜时间自定义设置，默认1小时
+            "contest-id": str(problem_set.get("id", "default-id")),
+        })
+
+    def _contest_duration(self):
+        """比赛时长（秒）"""
+        return int(self.exam_info.get("problemSet", {}).get("duration", 14400))
+
+    @staticmethod
+    def format_duration(total_seconds):
+        """秒数转换为时:分:秒格式"""
+        hours = total_seconds // 3600
+        minutes = (total_seconds % 3600) // 60
+        seconds = total_seconds % 60
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+
     def _add_static_nodes(self):
         """添加静态配置节点"""
         # 地区信息
-        region = ET.SubElement(self.contest_root, "region")
-        ET.SubElement(region, "external-id").text = "1"
-        ET.SubElement(region, "name").text = "HBUE"
+        self._add_node("region", {"external-id": "1", "name": self.region})
 
         # 判罚类型
-        judgements = [
-            {"id": "1", "acronym": "ACCEPTED", "name": "ACCEPTED", "solved": "true", "penalty": "false"},
-            {"id": "2", "acronym": "SEGMENTATION_FAULT", "name": "SEGMENTATION_FAULT", "solved": "false","penalty": "true"},
-            {"id": "3", "acronym": "WRONG_ANSWER", "name": "WRONG_ANSWER", "solved": "false", "penalty": "true"},
-            {"id": "4", "acronym": "TIME_LIMIT_EXCEEDED", "name": "TIME_LIMIT_EXCEEDED", "solved": "false","penalty": "true"},
-            {"id": "5", "acronym": "COMPILE_ERROR", "name": "COMPILE_ERROR", "solved": "false", "penalty": "false"},
-            {"id": "6", "acronym": "FLOAT_POINT_EXCEPTION", "name": "FLOAT_POINT_EXCEPTION", "solved": "false","penalty": "true"},
-            {"id": "7", "acronym": "MEMORY_LIMIT_EXCEEDED", "name": "MEMORY_LIMIT_EXCEEDED", "solved": "false","penalty": "true"},
-            {"id": "8", "acronym": "NON_ZERO_EXIT_CODE", "name": "NON_ZERO_EXIT_CODE", "solved": "false","penalty": "true"},
-            {"id": "9", "acronym": "RUNTIME_ERROR", "name": "RUNTIME_ERROR", "solved": "false", "penalty": "true"},
-            {"id": "10", "acronym": "PRESENTATION_ERROR", "name": "PRESENTATION_ERROR", "solved": "false","penalty": "true"},
-            {"id": "11", "acronym": "OUTPUT_LIMIT_EXCEEDED", "name": "OUTPUT_LIMIT_EXCEEDED", "solved": "false","penalty": "true"}
-        ]
-        for j in judgements:
-            judgement = ET.SubElement(self.contest_root, "judgement")
-            for key, value in j.items():
-                ET.SubElement(judgement, key).text = str(value)
+        for j in self.JUDGEMENTS:
+            self._add_node("judgement", {key: str(value) for key, value in j.items()})
 
         # 编程语言
-        languages = [("1", "c"), ("2", "c++"), ("3", "java"), ("4", "python")]
-        for lang_id, lang_name in languages:
-            lang = ET.SubElement(self.contest_root, "language")
-            ET.SubElement(lang, "id").text = lang_id
-            ET.SubElement(lang, "name").text = lang_name
+        for lang_id, lang_name in self.LANGUAGES:
+            self._add_node("language", {"id": lang_id, "name": lang_name})
+
+    def _fetch_problems(self):
+        """获取题目数据"""
+        url = f'{self.base_url}/problem-sets/{self.selected_problem_set_id}/preview/problems?problem_type=PROGRAMMING&page=0&limit=500'
+        return self._get_json(url)
 
-    def _process_problems(self):
+    def _process_problems(self, problem_data):
         """处理题目数据"""
-        url = f'https://pintia.cn/api/problem-sets/{self.selected_problem_set_id}/preview/problems?problem_type=PROGRAMMING&page=0&limit=500'
-        resp = self.session.get(url)
-        problem_data = resp.json()
         problems = problem_data.get("problemSetProblems", [])
-        letters = self.generate_letters(len(problems))
+        self.label_map = self._build_label_map(problems)
+
+        # 添加problem节点
+        for info in self.label_map.values():
+            self._add_node("problem", {"id": info["xml_id"], "letter": info["letter"], "name": info["letter"]})
 
-        # 创建题目映射表
-        self.label_map = {
+    def _build_label_map(self, problems):
+        """创建题目映射表：题目ID -> {xml_id, letter}"""
+        letters = self.generate_letters(len(problems))
+        return {
             p["id"]: {
                 "xml_id": str(idx + 1),
                 "letter": letters[idx]
             } for idx, p in enumerate(problems)
         }
 
-        # 添加problem节点
-        for idx, problem in enumerate(problems):
-            problem_elem = ET.SubElement(self.contest_root, "problem")
-            ET.SubElement(problem_elem, "id").text = str(idx + 1)
-            ET.SubElement(problem_elem, "letter").text = letters[idx]
-            ET.SubElement(problem_elem, "name").text = letters[idx]
-
-    def _process_teams(self):
+    def _fetch_teams(self):
+        """分页获取成员数据，返回队伍记录列表[{"id", "name"}]
+
+        首页返回total时其余页并发获取，否则逐页获取直到不足一页。
+        """
+        limit = self.member_page_size
+        first = self._fetch_member_page(0, limit)
+        pages = [first]
+
+        total = first.get("total")
+        if total is not None:
+            page_count = -(-int(total) // limit)
+            rest = range(1, page_count)
+            if self.max_workers > 1 and len(rest) > 1:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    pages.extend(pool.map(lambda page: self._fetch_member_page(page, limit), rest))
+            else:
+                pages.extend(self._fetch_member_page(page, limit) for page in rest)
+        else:
+            # 没有total时逐页获取；接口忽略page参数时每次都返回同一页，一旦某页没有新成员即停止
+            seen = {team["id"] for team in first["teams"]}
+            page = 0
+            while pages[-1]["count"] >= limit:
+                page += 1
+                next_page = self._fetch_member_page(page, limit)
+                new_ids = {team["id"] for team in next_page["teams"]} - seen
+                if not new_ids:
+                    break
+                seen |= new_ids
+                pages.append(next_page)
+
+        # 分页偏移可能因成员变动而重叠，按userId去重
+        teams, seen = [], set()
+        for page in pages:
+            for team in page["teams"]:
+                if team["id"] not in seen:
+                    seen.add(team["id"])
+                    teams.append(team)
+        return teams
+
+    def _fetch_member_page(self, page, limit):
+        """获取一页成员，并立即与studentUserById合并成队伍记录，不保留原始响应"""
+        url = f'{self.base_url}/problem-sets/{self.selected_problem_set_id}/members?page={page}&limit={limit}'
+        members_data = self._get_json(url)
+        members = members_data.get("members", [])
+        students = members_data.get("studentUserById", {})
+        teams = [{
+            "id": member.get("userId"),
+            "name": students.get(member.get("studentUserId", ""), {}).get("name", "未知队员"),
+        } for member in members]
+        return {"teams": teams, "count": len(members), "total": members_data.get("total")}
+
+    def _process_teams(self, teams):
         """处理团队信息"""
-        url = f'https://pintia.cn/api/problem-sets/{self.selected_problem_set_id}/members?limit=1000'
-        resp = self.session.get(url)
-        members_data = resp.json()
-
-        for member in members_data.get("members", []):
-            user_id = member.get("userId")
-            student_info = members_data.get("studentUserById", {}).get(member.get("studentUserId", ""), {})
-
-            team = ET.SubElement(self.contest_root, "team")
-            ET.SubElement(team, "id").text = user_id
-            ET.SubElement(team, "external-id").text = "1"
-            ET.SubElement(team, "region").text = "HBUE"
-            ET.SubElement(team, "name").text = student_info.get("name", "未知队员")
-            ET.SubElement(team, "university").text = "HBUE"
+        self.teams = teams
+        for team in teams:
+            self._add_node("team", {
+                "id": team["id"],
+                "external-id": "1",
+                "region": self.region,
+                "name": team["name"],
+                "university": self.university,
+            })
 
     def _process_submissions(self):
-        """处理提交记录"""
-        submission_counter = 1
-        base_url = f"https://pintia.cn/api/problem-sets/{self.selected_problem_set_id}/submissions"
-        before = None
+        """处理提交记录
 
+        filter_window为True时丢弃比赛时间外和非成员的提交；提交由新到旧排列，
+        一旦整页都早于比赛开始就不再继续翻页。
+        """
         # 获取比赛开始时间
         start_at = self.exam_info.get("problemSet", {}).get("startAt")
-        contest_start = datetime.fromisoformat(start_at.replace('Z', '+00:00')).astimezone(timezone.utc)
+        contest_start_us = to_epoch_us(start_at)
+        window = teams = until = None
+        if self.filter_window:
+            window = (contest_start_us, contest_start_us + self._contest_duration() * 1000000)
+            teams = [team["id"] for team in self.teams]
+            until = self._before_start(contest_start_us)
+
+        probe = None
+        if self.submission_store is None and self.shard_workers > 1 and len(self.label_map) > 1:
+            probe = self._probe_problem_filter(until)
+
+        if self.submission_store is not None:
+            if self.sync_on_export:
+                self.sync_submissions()
+            pages = self._chunked(self.submission_store.iter_submissions(self.selected_problem_set_id), 500)
+        elif probe is not None:
+            pages = self._iter_sharded_pages(until=until, first_page=probe)
+        else:
+            # 后台线程请求并解析后续页，与当前页的入表、渲染重叠进行
+            pages = (page for page, _ in prefetch(self._iter_submission_pages(until=until), self.prefetch_pages))
+
+        # 逐页入列式表，再按批渲染run节点
+        self.submission_table = table = SubmissionTable(self.label_map, window, teams)
+        for page in pages:
+            start = table.extend(page)
+            self._add_run_nodes(table, start, contest_start_us)
+            kept = len(table) - start
+            self.metrics.record_page(kept, len(page) - kept)
+            if table.before_window:
+                break
 
+    @staticmethod
+    def _chunked(iterable, size):
+        """把迭代器按size条分批"""
+        iterator = iter(iterable)
         while True:
-            url = f"{base_url}?limit=50" + (f"&before={before}" if before else "")
-            resp = self.session.get(url)
-            print(resp.status_code)
-            if resp.status_code != 200:
+            chunk = list(islice(iterator, size))
+            if not chunk:
                 break
+            yield chunk
+
+    def _iter_submission_pages(self, before=None, problem_id=None, semaphore=None, until=None):
+        """从游标before开始由新到旧逐页获取提交记录，返回(本页提交, 下一页游标)
+
+        给出problem_id时只获取该题的提交；semaphore用于限制分片获取时同时进行的请求数；
+        until(本页提交)为True时返回本页后即停止翻页。停止条件由生成器自己判断，
+        经prefetch预取时后台线程也不会多请求后面的页。
+        """
+        submissions_url = f"{self.base_url}/problem-sets/{self.selected_problem_set_id}/submissions"
+        if problem_id is not None:
+            submissions_url += "?filter=" + quote(json.dumps({"problemSetProblemId": problem_id})) + "&"
+        else:
+            submissions_url += "?"
+
+        while True:
+            url = f"{submissions_url}limit=50" + (f"&before={before}" if before else "")
+            if semaphore is None:
+                resp = self._get(url)
+            else:
+                with semaphore:
+                    resp = self._get(url)
+            if resp.status_code != 200:
+                # 中途失败不能当作已到末页，否则会生成不完整的XML
+                raise Exception(f"获取提交记录失败，状态码：{resp.status_code}")
 
             data = resp.json()
             submissions = data.get("submissions", [])
             if not submissions:
                 break
 
+            before = self._next_cursor(data)
+            yield submissions, before
+            if not before or (until is not None and until(submissions)):
+                break
+
+    @staticmethod
+    def _before_start(contest_start_us):
+        """停止条件：整页提交都早于比赛开始（提交由新到旧排列）"""
+        return lambda submissions: max(to_epoch_us(sub["submitAt"]) for sub in submissions) < contest_start_us
+
+    def _probe_problem_filter(self, until=None):
+        """用第一题的第一页检查接口是否支持按题目筛选提交（不支持时返回的提交会包含其它题目）
+
+        支持时返回这一页的(提交, 下一页游标)，作为该题分片的第一页直接使用，不再重复请求；不支持时返回None。
+        """
+        problem_id = next(iter(self.label_map))
+        try:
+            first_page = next(self._iter_submission_pages(problem_id=problem_id, until=until), ([], None))
+        except Exception:
+            return None
+        if not all(sub.get("problemSetProblemId") == problem_id for sub in first_page[0]):
+            return None
+        return first_page
+
+    def _iter_shard_pages(self, problem_id, semaphore, until=None, first_page=None):
+        """一个题目分片的提交页；给出first_page时从它开始，接着它的游标继续翻页"""
+        before = None
+        if first_page is not None:
+            submissions, before = first_page
+            if not submissions:
+                return
+            yield submissions
+            if not before or (until is not None and until(submissions)):
+                return
+        for page, _ in self._iter_submission_pages(before, problem_id, semaphore, until):
+            yield page
+
+    def _iter_sharded_pages(self, page_size=50, until=None, first_page=None):
+        """按题目分片并发获取提交记录，按提交ID由新到旧归并、去重后每page_size条一页返回
+
+        各分片共用调度器的限速，同时进行的请求数不超过shard_workers，每个分片按until各自停止翻页。
+        first_page为第一题已获取的第一页（_probe_problem_filter的结果）。
+        不在题目列表中的题目的提交不会被获取。
+        """
+        semaphore = threading.Semaphore(self.shard_workers)
+        shards = [
+            self._iter_shard_pages(problem_id, semaphore, until, first_page if i == 0 else None)
+            for i, problem_id in enumerate(self.label_map)
+        ]
+        merged = merge_batches(shards, key=lambda sub: submission_key(sub["id"]),
+                               depth=max(1, self.prefetch_pages), reverse=True)
+
+        def _unique(submissions):
+            last_id = None
             for sub in submissions:
-                self._add_submission_node(sub, submission_counter, contest_start)
-                submission_counter += 1
+                if sub["id"] != last_id:
+                    last_id = sub["id"]
+                    yield sub
+
+        try:
+            yield from self._chunked(_unique(merged), page_size)
+        finally:
+            merged.close()
+
+    def fetch_submission_detail(self, submission_id):
+        """获取单个提交的详情（含源代码），无权查看（403/404）时返回None"""
+        resp = self._get(f"{self.base_url}/submissions/{submission_id}")
+        if resp.status_code in (403, 404):
+            return None
+        if resp.status_code != 200:
+            raise Exception(f"获取提交详情失败，状态码：{resp.status_code}")
+        return resp.json().get("submission", {})
 
-            if not data.get("hasBefore", True):
+    @staticmethod
+    def _next_cursor(data):
+        """根据返回数据计算下一页的before游标，没有更早的记录时返回None"""
+        if not data.get("hasBefore", True):
+            return None
+        details = data.get("showDetailBySubmissionId")
+        return list(details.keys())[-1] if details else None
+
+    def sync_submissions(self, on_page=None):
+        """增量同步提交记录到本地存储，返回本次保存的提交数
+
+        on_page(submissions)会在每页写入存储后被调用。
+        filter_window为True时翻到比赛开始之前即停止，赛前练习的提交不会被下载（导出时也不需要）。
+        """
+        store = self.submission_store
+        problem_set_id = str(self.selected_problem_set_id)
+        saved = 0
+
+        before_start = None
+        if self.filter_window:
+            start_us = self._contest_start_us()
+            before_start = self._before_start(start_us) if start_us is not None else None
+
+        state = store.get_state(problem_set_id)
+        if state["pending_top"]:
+            # 上次同步中途中断，从保存的游标处继续
+            saved += self._sync_range(state["pending_cursor"], state["pending_stop"], state["pending_top"],
+                                      on_page, before_start)
+
+        saved += self._sync_range(None, store.stop_id(problem_set_id), on_page=on_page, before_start=before_start)
+        return saved
+
+    def _contest_start_us(self):
+        """比赛开始时间（微秒时间戳），尚未获取当前题目集的比赛信息时先获取；题目集没有开始时间时返回None"""
+        if str(self.exam_info.get("problemSet", {}).get("id")) != str(self.selected_problem_set_id):
+            self.exam_info = self._fetch_exam_info()
+        start_at = self.exam_info.get("problemSet", {}).get("startAt")
+        return to_epoch_us(start_at) if start_at else None
+
+    def _sync_range(self, before, stop_id, top_id=None, on_page=None, before_start=None):
+        """从游标before向更早翻页直到stop_id（或before_start判断整页早于比赛开始），逐页写入本地存储"""
+        store = self.submission_store
+        problem_set_id = str(self.selected_problem_set_id)
+        stop_key = submission_key(stop_id) if stop_id else None
+        saved = 0
+
+        # 翻到stop_id所在的页（或比赛开始之前）即停止，预取线程不会越过这一页
+        def until(subs):
+            return ((stop_key is not None and submission_key(subs[-1]["id"]) < stop_key)
+                    or (before_start is not None and before_start(subs)))
+        for submissions, cursor in prefetch(self._iter_submission_pages(before, until=until), self.prefetch_pages):
+            if top_id is None:
+                top_id = str(submissions[0]["id"])
+                store.begin_sync(problem_set_id, top_id, stop_id)
+
+            kept = [sub for sub in submissions
+                    if stop_key is None or submission_key(sub["id"]) >= stop_key]
+            store.save_page(problem_set_id, kept, cursor)
+            saved += len(kept)
+            if on_page is not None:
+                on_page(kept)
+            if len(kept) < len(submissions):
                 break
-            before = list(data.get("showDetailBySubmissionId", {}).keys())[-1] if data.get(
-                "showDetailBySubmissionId") else None
-
-    def _add_submission_node(self, submission, counter, contest_start):
-        """添加单个提交节点"""
-        run = ET.SubElement(self.contest_root, "run")
-        problem_id = submission["problemSetProblemId"]
-        problem_info = self.label_map.get(problem_id, {"xml_id": "0"})
-
-        # 时间计算
-        submit_time = datetime.fromisoformat(submission["submitAt"].replace("Z", "+00:00")).astimezone(timezone.utc)
-        time_diff = submit_time - contest_start
-
-        # 节点内容
-        elements = {
-            "id": str(counter),
-            "judged": "True",
-            "language": "c",
-            "problem": problem_info["xml_id"],
-            "status": "done",
-            "team": submission["userId"],
-            "time": str(int(time_diff.total_seconds())),
-            "timestamp": f"{submit_time.timestamp():.2f}",
-            "solved": "true" if submission["status"] == "ACCEPTED" else "false",
-            "penalty": "false" if submission["status"] == "COMPILE_ERROR" else "true",
-            "result": submission["status"]
-        }
 
-        for key, value in elements.items():
-            ET.SubElement(run, key).text = value
+        store.finish_sync(problem_set_id)
+        return saved
+
+    def _add_run_nodes(self, table, start, contest_start_us, stop=None):
+        """添加提交节点（table中从start到stop的行），run的id即行号+1"""
+        stop = len(table) if stop is None else stop
+        offsets = table.time_offsets(contest_start_us, start, stop)
+        flags = self._judgement_flags()
+        solved = table.map_status(table.status_lookup(lambda s: "true" if flags.get(s, (False,))[0] else "false"), start, stop)
+        penalty = table.map_status(table.status_lookup(lambda s: "true" if flags.get(s, (False, True))[1] else "false"), start, stop)
+        teams, statuses = table.teams, table.statuses
+
+        team_codes, problems, submit_us, status_codes = table.team, table.problem, table.submit_us, table.status
+        rows = range(start, stop)
+        self._add_nodes("run", self.RUN_FIELDS, (
+            (str(row + 1), "True", "c", str(problems[row]), "done", teams[team_codes[row]], str(offsets[i]),
+             f"{submit_us[row] / 1000000:.2f}", solved[i], penalty[i], statuses[status_codes[row]])
+            for i, row in enumerate(rows)
+        ))
+
+    def _judgement_flags(self):
+        """判题状态 -> (是否通过, 是否计罚时)"""
+        return {j["acronym"]: (j["solved"] == "true", j["penalty"] == "true") for j in self.JUDGEMENTS}
+
+    def _build_scoreboard(self):
+        """按时间顺序遍历全部提交，计算封榜前和最终榜单"""
+        table = self.submission_table
+        scoreboard = Scoreboard([team["id"] for team in self.teams], len(self.label_map),
+                                self._contest_duration(), self.penalty_minutes, self.freeze_seconds)
+        if table is None or not len(table):
+            return scoreboard
+
+        contest_start_us = to_epoch_us(self.exam_info.get("problemSet", {}).get("startAt"))
+        offsets = table.time_offsets(contest_start_us)
+        flags = self._judgement_flags()
+        run_flags = table.status_lookup(lambda s: flags.get(s, (False, True)))
+        teams, team_codes, problems, status_codes = table.teams, table.team, table.problem, table.status
+
+        # 提交按ID从新到旧排列，通常倒序即为时间顺序；否则按提交时间排序（同一时间按ID从旧到新）
+        rows = range(len(table) - 1, -1, -1)
+        submit_us = table.submit_us
+        if any(submit_us[row] < submit_us[row + 1] for row in range(len(table) - 1)):
+            rows = sorted(rows, key=lambda row: (submit_us[row], -row))
+        for row in rows:
+            solved, penalty = run_flags[status_codes[row]]
+            scoreboard.add_run(teams[team_codes[row]], problems[row] - 1, offsets[row], solved, penalty)
+        return scoreboard
 
     def _add_finalized_node(self):
-        """添加finalized节点"""
-        finalized = ET.SubElement(self.contest_root, "finalized")
-        ET.SubElement(finalized, "last_gold").text = "1"
-        ET.SubElement(finalized, "last_silver").text = "1"
-        ET.SubElement(finalized, "last_bronze").text = "1"
-        ET.SubElement(finalized, "time").text = "0"
-
-        # 计算结束时间
-        duration = self.exam_info.get("duration", "4:00:00")
-        hours, minutes, seconds = map(float, duration.split(':'))
-        total_seconds = hours * 3600 + minutes * 60 + seconds
+        """添加finalized节点，奖牌线按最终榜单计算"""
+        self.scoreboard = self._build_scoreboard()
+        last_gold, last_silver, last_bronze = self.scoreboard.medal_cutoffs(self.medals)
+
+        # 结束时间 = 开始时间 + 题目集时长
         end_timestamp = datetime.fromisoformat(
             self.exam_info.get("problemSet", {}).get("startAt").replace('Z', '+00:00')
-        ).timestamp() + total_seconds
+        ).timestamp() + self._contest_duration()
 
-        ET.SubElement(finalized, "timestamp").text = f"{end_timestamp:.1f}"
+        self._add_node("finalized", {
+            "last_gold": str(last_gold),
+            "last_silver": str(last_silver),
+            "last_bronze": str(last_bronze),
+            "time": "0",
+            "timestamp": f"{end_timestamp:.1f}",
+        })
 
     def _save_xml(self, path):
         """保存XML文件"""
-        self.indent(self.contest_root)
-        xml_str = ET.tostring(self.contest_root, encoding="unicode")
-        with open(path, "w", encoding="utf-8") as f:
-            f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-            f.write(xml_str)
+        self.xml_writer.close()
 
 
-# 使用示例
+# 使用示例：python pta_tool_class.py list / export <题目集ID>，详见pta_cli.py
 if __name__ == "__main__":
-    generator = PTAContestGenerator()
-
-    # 获取题目集列表
-    print("可用题目集：")
-    for ps in generator.get_problem_sets():
-        print(f"{ps['name']} ({ps['id']})")
-
-    # 选择题目集（示例ID）
-    generator.select_problem_set("1")
+    import sys
+    from pta_cli import main
 
-    # 生成XML文件
-    output = generator.generate_contest_xml()
-    print(f"生成完成：{output}")
\ No newline at end of file
+    sys.exit(main())
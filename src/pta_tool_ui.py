@@ -1,11 +1,15 @@
 # pta_tool_ui.py
 import json
+import queue
+import sys
 import threading
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
+from pta_cache import INTERACTIVE_TTLS
 from pta_tool_class import PTAContestGenerator
 
 CONFIG_FILE = "pta_config.json"
+CACHE_FILE = "pta_cache.db"
 
 
 class ConfigWindow(tk.Toplevel):
@@ -89,11 +93,21 @@ class MainApplication(tk.Tk):
         self.geometry("800x600")
 
         self.generator = PTAContestGenerator()
-        self.problem_sets = []
+        self.generator.set_response_cache(CACHE_FILE, ttls=INTERACTIVE_TTLS)
+        self.generator.progress_callback = self._on_progress
+        self.problem_sets = []  # 已加载的全部题目集
+        self._loaded_ids = set()  # 已加载的题目集ID（按更新时间分页时，加载中被修改的题目集会出现两次）
+        self.filtered = []  # 符合搜索条件的题目集
         self.selected_id = None
+        self._ui_queue = queue.Queue()  # 工作线程通过队列把界面更新交给主线程执行
+        self._load_token = 0  # 每次刷新列表加一，丢弃过期加载线程的结果
+        self._offset = 0  # 列表当前显示的第一行在filtered中的下标
+        self._visible_rows = 20
+        self._filter_job = None
 
         self._check_config()
         self._create_widgets()
+        self.after(100, self._drain_ui_queue)
 
     def _check_config(self):
         """检查配置文件"""
@@ -112,11 +126,23 @@ class MainApplication(tk.Tk):
         toolbar.pack(fill=tk.X, padx=2, pady=2)
 
         ttk.Button(toolbar, text="配置Cookie", command=self.open_config_window).pack(side=tk.LEFT, padx=2)
-        ttk.Button(toolbar, text="刷新列表", command=self.load_problem_sets).pack(side=tk.LEFT, padx=2)
+        ttk.Button(toolbar, text="刷新列表", command=lambda: self.load_problem_sets(refresh=True)).pack(side=tk.LEFT, padx=2)
         ttk.Button(toolbar, text="生成XML", command=self.generate_xml).pack(side=tk.RIGHT, padx=2)
 
-        # 题目集列表
-        self.tree = ttk.Treeview(self, columns=("id", "name",  "time"), show="headings")
+        # 搜索框：按名称、ID或开始时间筛选
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self._schedule_filter())
+        ttk.Entry(toolbar, textvariable=self.search_var, width=30).pack(side=tk.RIGHT, padx=2)
+        ttk.Label(toolbar, text="搜索:").pack(side=tk.RIGHT)
+
+        # 状态栏
+        self.status = ttk.Label(self, text="就绪", relief=tk.SUNKEN)
+        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+
+        # 题目集列表：只创建可见的行，滚动时替换内容
+        frame = ttk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.tree = ttk.Treeview(frame, columns=("id", "name",  "time"), show="headings", selectmode="browse")
         self.tree.heading("id", text="ID")
         self.tree.heading("name", text="名称")
         # self.tree.heading("count", text="题目数")
@@ -125,63 +151,209 @@ class MainApplication(tk.Tk):
         self.tree.column("name", width=300)
         # self.tree.column("count", width=80)
         self.tree.column("time", width=200)
-        self.tree.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.scrollbar = ttk.Scrollbar(frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        # 状态栏
-        self.status = ttk.Label(self, text="就绪", relief=tk.SUNKEN)
-        self.status.pack(side=tk.BOTTOM, fill=tk.X)
+        self._row_height = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self._scroll_to(self._offset + (-3 if e.delta > 0 else 3)))
+        self.tree.bind("<Button-4>", lambda e: self._scroll_to(self._offset - 3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_to(self._offset + 3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._visible_rows))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._visible_rows))
+
+    def _post(self, func, *args):
+        """在主线程中执行界面更新（可在任意线程调用）"""
+        self._ui_queue.put((func, args))
+
+    def _set_status(self, text):
+        """更新状态栏（可在任意线程调用）"""
+        self._post(self.status.config, {"text": text})
+
+    def _drain_ui_queue(self):
+        try:
+            while True:
+                try:
+                    func, args = self._ui_queue.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    func(*args)
+                except Exception:
+                    # 单个更新出错不能中断队列，否则之后的进度和结果都无法显示
+                    self.report_callback_exception(*sys.exc_info())
+        finally:
+            self.after(50, self._drain_ui_queue)
+
+    def _on_progress(self, event):
+        """导出进度回调，在状态栏显示当前阶段和进度"""
+        text = f"{event['phase_name']}... 已用时{event['elapsed']:.1f}秒，请求{event['requests']}次"
+        if event["phase"] == "submissions":
+            text = (f"{event['phase_name']}：已处理{event['pages']}页，{event['runs']}条提交"
+                    f"（{event['runs_per_second']:.0f}条/秒），请求{event['requests']}次")
+        self._set_status(text)
 
     def open_config_window(self):
         """打开配置窗口"""
         ConfigWindow(self)
 
-    def load_problem_sets(self):
-        """加载题目集列表"""
+    # ---- 题目集列表（虚拟滚动） ----
+
+    def _matches(self, ps, query):
+        """题目集是否符合搜索条件（名称、ID或开始时间包含关键字，不区分大小写）"""
+        return (query in str(ps["name"]).lower() or query in str(ps["id"]).lower()
+                or query in str(ps["start_time"] or "未设置").lower())
+
+    def _schedule_filter(self):
+        # 输入停顿后再筛选，避免每敲一个字都重新过滤
+        if self._filter_job is not None:
+            self.after_cancel(self._filter_job)
+        self._filter_job = self.after(150, self._apply_filter)
+
+    def _apply_filter(self):
+        self._filter_job = None
+        query = self.search_var.get().strip().lower()
+        self.filtered = [ps for ps in self.problem_sets if self._matches(ps, query)] if query else list(self.problem_sets)
+        self._offset = 0
+        self._render_rows()
+
+    def _append_problem_sets(self, token, page):
+        """加入新加载的一页题目集（主线程）"""
+        if token != self._load_token:
+            return
+        page = [ps for ps in page if str(ps["id"]) not in self._loaded_ids]
+        self._loaded_ids.update(str(ps["id"]) for ps in page)
+        self.problem_sets.extend(page)
+        query = self.search_var.get().strip().lower()
+        self.filtered.extend(ps for ps in page if not query or self._matches(ps, query))
+        self._render_rows()
+        self.status.config(text=f"正在加载题目集...已加载{len(self.problem_sets)}个")
+
+    def _render_rows(self):
+        """只在Treeview中创建当前可见的行"""
+        total = len(self.filtered)
+        self._offset = max(0, min(self._offset, total - self._visible_rows))
+        window = self.filtered[self._offset:self._offset + self._visible_rows]
+
+        self.tree.delete(*self.tree.get_children())
+        for ps in window:
+            self.tree.insert("", "end", iid=str(ps["id"]), values=(
+                ps["id"],
+                ps["name"],
+                # ps["problem_count"],
+                ps["start_time"] or "未设置"
+            ))
+        if self.selected_id is not None and self.tree.exists(str(self.selected_id)):
+            self.tree.selection_set(str(self.selected_id))
+
+        if total:
+            self.scrollbar.set(self._offset / total, min(1.0, (self._offset + len(window)) / total))
+        else:
+            self.scrollbar.set(0, 1)
+
+    def _scroll_to(self, offset):
+        self._offset = offset
+        self._render_rows()
+        return "break"
+
+    def _on_scrollbar(self, action, value, unit=None):
+        total = len(self.filtered)
+        if action == "moveto":
+            self._scroll_to(int(float(value) * total))
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self._scroll_to(self._offset + int(value) * step)
+
+    def _on_resize(self, event):
+        rows = max(1, event.height // self._row_height - 1)  # 减去表头一行
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._render_rows()
+
+    def _on_select(self, event):
+        selected = self.tree.selection()
+        if selected:
+            self.selected_id = selected[0]
+
+    def _move_selection(self, step):
+        """键盘上下移动选中行，到达可见区域边缘时滚动列表"""
+        if not self.filtered:
+            return "break"
+        ids = [str(ps["id"]) for ps in self.filtered]
+        index = ids.index(self.selected_id) + step if self.selected_id in ids else self._offset
+        index = max(0, min(index, len(ids) - 1))
+        self.selected_id = ids[index]
+        if index < self._offset:
+            self._offset = index
+        elif index >= self._offset + self._visible_rows:
+            self._offset = index - self._visible_rows + 1
+        self._render_rows()
+        self.tree.focus(self.selected_id)
+        return "break"
+
+    def load_problem_sets(self, refresh=False):
+        """加载题目集列表：后台线程逐页获取，每页到达后立即显示；refresh=True时忽略本地缓存"""
+        self._load_token += 1
+        token = self._load_token
+        self.problem_sets = []
+        self._loaded_ids = set()
+        self.filtered = []
+        self._offset = 0
+        self._render_rows()
+        self.status.config(text="正在加载题目集...")
 
         def _load():
             try:
-                self.status.config(text="正在加载题目集...")
-                self.problem_sets = self.generator.get_problem_sets()
-                self.tree.delete(*self.tree.get_children())
-                for ps in self.problem_sets:
-                    self.tree.insert("", "end", values=(
-                        ps["id"],
-                        ps["name"],
-                        # ps["problem_count"],
-                        ps["start_time"] or "未设置"
-                    ))
-                self.status.config(text=f"加载完成，共{len(self.problem_sets)}个题目集")
+                for page in self.generator.iter_problem_sets(refresh):
+                    if token != self._load_token:
+                        return
+                    self._post(self._append_problem_sets, token, page)
+                self._post(self._finish_loading, token, None)
             except Exception as e:
-                messagebox.showerror("错误", str(e))
-                self.status.config(text="加载失败")
+                self._post(self._finish_loading, token, e)
 
         threading.Thread(target=_load, daemon=True).start()
 
+    def _finish_loading(self, token, error):
+        if token != self._load_token:
+            return
+        if error is not None:
+            self.status.config(text="加载失败")
+            messagebox.showerror("错误", str(error))
+        else:
+            self.status.config(text=f"加载完成，共{len(self.problem_sets)}个题目集")
+
     def generate_xml(self):
         """生成XML文件"""
-        selected = self.tree.selection()
-        if not selected:
+        if not self.selected_id:
             messagebox.showwarning("提示", "请先选择题目集")
             return
+        problem_id = self.selected_id
 
-        item = self.tree.item(selected[0])
-        problem_id = item["values"][0]
+        # 对话框必须在主线程中打开
+        output_path = filedialog.asksaveasfilename(
+            defaultextension=".xml",
+            filetypes=[("XML文件", "*.xml")]
+        )
+        if not output_path:
+            return
 
         def _generate():
             try:
-                self.status.config(text="正在生成XML...")
+                self._set_status("正在生成XML...")
                 self.generator.select_problem_set(problem_id)
-                output_path = filedialog.asksaveasfilename(
-                    defaultextension=".xml",
-                    filetypes=[("XML文件", "*.xml")]
-                )
-                if output_path:
-                    self.generator.generate_contest_xml(output_path)
-                    messagebox.showinfo("成功", f"文件已生成至:\n{output_path}")
-                    self.status.config(text="生成完成")
+                self.generator.generate_contest_xml(output_path)
+                metrics = self.generator.metrics
+                self._set_status(f"生成完成：{metrics.runs}条提交，请求{metrics.requests}次，"
+                                 f"用时{sum(metrics.phases.values()):.1f}秒")
+                self._post(messagebox.showinfo, "成功", f"文件已生成至:\n{output_path}")
             except Exception as e:
-                messagebox.showerror("错误", str(e))
-                self.status.config(text="生成失败")
+                self._set_status("生成失败")
+                self._post(messagebox.showerror, "错误", str(e))
 
         threading.Thread(target=_generate, daemon=True).start()
 
@@ -0,0 +1,163 @@
+# pta_xml_writer.py
+import os
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+
+
+def indent(elem, level=0):
+    """XML格式化工具"""
+    i = "\n" + level * "  "
+    if len(elem):
+        if not elem.text or not elem.text.strip():
+            elem.text = i + "  "
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+        for child in elem:
+            indent(child, level + 1)
+        if not elem.tail or not elem.tail.strip():
+            elem.tail = i
+    else:
+        if level and (not elem.tail or not elem.tail.strip()):
+            elem.tail = i
+
+
+def open_output(path, buffer_size=-1, compress=None):
+    """打开输出文件，compress为None时按路径是否以.gz结尾决定是否写入gzip压缩的内容"""
+    if compress is None:
+        compress = path.endswith(".gz")
+    if compress:
+        import gzip
+        import io
+        # mtime固定为0，相同内容得到相同的压缩文件
+        return io.TextIOWrapper(gzip.GzipFile(path, "wb", compresslevel=6, mtime=0), encoding="utf-8")
+    return open(path, "w", encoding="utf-8", buffering=buffer_size)
+
+
+def _temp_path(path):
+    """写入过程中使用的临时文件，完成后才替换目标文件，失败时不会破坏已有的输出"""
+    return path + ".tmp"
+
+
+def escape_text(text):
+    """转义文本节点（与ElementTree的转义规则一致）"""
+    if "&" not in text and "<" not in text and ">" not in text:
+        return text
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+
+class TreeXMLWriter:
+    """先在内存中构建完整的ElementTree，关闭时统一格式化并保存（路径以.gz结尾时gzip压缩）"""
+
+    def __init__(self, path, root_tag="contest"):
+        import xml.etree.ElementTree as ET
+        self.path = path
+        self.root = ET.Element(root_tag)
+        self._sub_element = ET.SubElement
+
+    def add(self, tag, fields):
+        """添加一个二级节点，fields为{子节点名: 文本}"""
+        elem = self._sub_element(self.root, tag)
+        for key, value in fields.items():
+            self._sub_element(elem, key).text = value
+        return elem
+
+    def add_rows(self, tag, keys, rows):
+        """批量添加结构相同的二级节点，rows中每行为与keys对应的文本元组"""
+        for row in rows:
+            self.add(tag, dict(zip(keys, row)))
+
+    def close(self):
+        """保存XML文件"""
+        import xml.etree.ElementTree as ET
+        indent(self.root)
+        xml_str = ET.tostring(self.root, encoding="unicode")
+        temp_path = _temp_path(self.path)
+        try:
+            # 临时文件名以.tmp结尾，是否压缩按目标路径判断
+            with open_output(temp_path, compress=self.path.endswith(".gz")) as f:
+                f.write(XML_HEADER)
+                f.write(xml_str)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        os.replace(temp_path, self.path)
+
+    def abort(self):
+        """放弃本次输出（尚未写入任何文件）"""
+
+
+class StreamingXMLWriter:
+    """边生成边写入文件，每个节点写完即释放，输出与TreeXMLWriter逐字节一致
+
+    内容先写入<path>.tmp，close()成功后才替换目标文件；中途失败时调用abort()删除临时文件，
+    已有的输出文件保持不变。
+    """
+
+    def __init__(self, path, root_tag="contest", buffer_size=1 << 16):
+        self.path = path
+        self.root_tag = root_tag
+        self.count = 0
+        self._temp_path = _temp_path(path)
+        self._file = open_output(self._temp_path, buffer_size, compress=path.endswith(".gz"))
+        self._file.write(XML_HEADER)
+
+    def add(self, tag, fields):
+        """写入一个二级节点，fields为{子节点名: 文本}"""
+        # 与indent()的结果保持一致：子节点缩进写在前一个节点之后，结束标签前保留同级缩进
+        parts = [f"<{self.root_tag}>\n  " if not self.count else ""]
+        if fields:
+            parts.append(f"<{tag}>")
+            for key, value in fields.items():
+                if value:
+                    parts.append(f"\n    <{key}>{escape_text(value)}</{key}>")
+                else:
+                    parts.append(f"\n    <{key} />")
+            parts.append(f"\n    </{tag}>\n  ")
+        else:
+            parts.append(f"<{tag} />\n  ")
+        self._file.write("".join(parts))
+        self.count += 1
+
+    def add_rows(self, tag, keys, rows):
+        """批量写入结构相同的二级节点，rows中每行为与keys对应的文本元组"""
+        template = f"<{tag}>" + "".join(f"\n    <{key}>%s</{key}>" for key in keys) + f"\n    </{tag}>\n  "
+        chunk = []
+        for row in rows:
+            if not self.count or not all(row):
+                # 根节点开头和空文本节点走通用路径
+                self._file.write("".join(chunk))
+                chunk.clear()
+                self.add(tag, dict(zip(keys, row)))
+                continue
+            joined = "".join(row)
+            if "&" in joined or "<" in joined or ">" in joined:
+                row = tuple(map(escape_text, row))
+            chunk.append(template % row)
+            self.count += 1
+        self._file.write("".join(chunk))
+
+    def close(self):
+        """写入根节点结束标签，关闭文件并替换目标文件"""
+        try:
+            self._file.write(f"</{self.root_tag}>\n" if self.count else f"<{self.root_tag} />")
+            self._file.close()
+        except BaseException:
+            self.abort()
+            raise
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        """不写结束标签，关闭并删除临时文件"""
+        try:
+            self._file.close()
+        except Exception:
+            pass  # 出错后的关闭失败（如磁盘已满）不应掩盖原始异常
+        if os.path.exists(self._temp_path):
+            os.remove(self._temp_path)